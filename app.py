@@ -10,8 +10,18 @@ import time
 import json
 from datetime import datetime
 
+# Set up logging before our modules are imported, since they log at import time
+# (a no-op when launcher.py has already configured it)
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.StreamHandler()
+    ]
+)
+
 # Import from our modules
-from utils import get_application_path, logger, clean_subreddit_name
+from utils import get_application_path, logger, clean_subreddit_name, orjson
 from reddit_wrapper import get_reddit_instance, get_reddit_content, update_credentials, reddit
 from settings import (
     load_settings, save_settings, import_settings, migrate_settings,
@@ -32,6 +42,26 @@ USER_CONTENT_DIR = None
 app = Flask(__name__)
 app.secret_key = os.environ.get('SECRET_KEY', 'dev_key_change_in_production')
 
+# Serialize jsonify() responses with orjson when it's installed
+# (JSON providers need Flask 2.2+; older versions keep the default encoder)
+try:
+    from flask.json.provider import DefaultJSONProvider
+except ImportError:
+    DefaultJSONProvider = None
+
+if orjson is not None and DefaultJSONProvider is not None:
+    class OrjsonProvider(DefaultJSONProvider):
+        """JSON provider that encodes and decodes with orjson."""
+
+        def dumps(self, obj, **kwargs):
+            return orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+
+        def loads(self, s, **kwargs):
+            return orjson.loads(s)
+
+    app.json = OrjsonProvider(app)
+    logger.info("Using orjson for JSON responses")
+
 # Initialize Reddit instance
 reddit = get_reddit_instance()
 if reddit is None:
@@ -8,7 +8,7 @@ import logging
 import sys
 from datetime import datetime
 
-from utils import get_application_path
+from utils import get_application_path, atomic_write, json_dumps
 
 # Get logger
 logger = logging.getLogger(__name__)
@@ -30,7 +30,7 @@ def create_credentials_template():
                 'user_agent': 'Goon/1.0'
             }
             with open(CREDENTIALS_TEMPLATE_FILE, 'w') as f:
-                json.dump(template, f, indent=4)
+                json.dump(template, f, indent=2)
             logger.info(f"Created credentials template at {CREDENTIALS_TEMPLATE_FILE}")
         except Exception as e:
             logger.error(f"Error creating credentials template: {str(e)}")
@@ -190,9 +190,8 @@ def save_credentials(credentials):
             logger.warning(f"Could not create directory for credentials: {str(dir_e)}")
             # Continue anyway, we'll handle the file creation error if it occurs
         
-        # Save credentials to file
-        with open(credentials_file_to_use, 'w') as f:
-            json.dump(credentials, f, indent=4)
+        # Save credentials to file atomically: write a temp file alongside it, then rename over it
+        atomic_write(credentials_file_to_use, json_dumps(credentials), '.credentials.')
         
         logger.info(f"Saved credentials to {credentials_file_to_use}")
         
@@ -257,7 +257,7 @@ if __name__ == '__main__':
         # Create default settings file
         try:
             with open(settings_file, 'w') as f:
-                json.dump(app_module.default_user_settings, f, indent=2)
+                json.dump(dict(app_module.default_user_settings), f, indent=2)
             print(f"Created default settings file at {settings_file}")
             logger.info(f"Created default settings file at {settings_file}")
         except Exception as e:
@@ -266,7 +266,7 @@ if __name__ == '__main__':
             alternative_settings_file = os.path.join(user_content_dir, 'user_settings.json')
             try:
                 with open(alternative_settings_file, 'w') as f:
-                    json.dump(app_module.default_user_settings, f, indent=2)
+                    json.dump(dict(app_module.default_user_settings), f, indent=2)
                 # Update the app to use this location
                 app_module.USER_SETTINGS_FILE = alternative_settings_file
                 print(f"Created default settings file in user content directory: {alternative_settings_file}")
@@ -5,11 +5,13 @@ Provides a custom Reddit class and functions for interacting with Reddit's API.
 import random
 import logging
 import time
+import threading
+from collections import Counter, OrderedDict
 import praw as praw_module
 # Don't import Reddit class directly to avoid any import-time issues
-from flask import jsonify
+from flask import jsonify, Response
 
-from utils import clean_subreddit_name
+from utils import clean_subreddit_name, json_dumps, orjson
 from credentials import load_credentials, save_credentials
 
 # Get logger
@@ -21,29 +23,309 @@ reddit = None
 # Track when the Reddit client was last initialized
 LAST_REDDIT_INIT = 0  # timestamp
 
-# Cache for Reddit content
-reddit_cache = {
-    # Structure: subreddit_name -> {
-    #   'submissions': [submission1, submission2, ...],
-    #   'last_updated': timestamp,
-    #   'type': 'hot'/'new'/'top'
-    # }
-}
+# Hash of the credentials the current Reddit client was created with
+_reddit_cred_hash = None
+
+# Cache for Reddit content, ordered from least to most recently used
+reddit_cache = OrderedDict()
+# Structure: subreddit_name -> {
+#   'submissions': [submission1, submission2, ...],
+#   'last_updated': timestamp,
+#   'type': 'hot'/'new'/'top'
+# }
 
 # Cache expiration times
 CACHE_EXPIRATION = 1800  # 30 minutes for normal cache
 CACHE_EXPIRATION_EMPTY = 300  # 5 minutes for empty/error results
 
+# Cache expiration indexed by whether a fetch met MIN_SUBMISSIONS_THRESHOLD
+_CACHE_EXPIRATIONS = (CACHE_EXPIRATION_EMPTY, CACHE_EXPIRATION)
+
 # Maximum number of subreddits to cache
 MAX_CACHE_ENTRIES = 50
 
 # Minimum number of submissions needed before trying additional API calls
 MIN_SUBMISSIONS_THRESHOLD = 10
 
+# Media file extensions that don't need an extension added to Imgur URLs
+_MEDIA_EXTS = ('.jpg', '.jpeg', '.png', '.gif', '.mp4', '.webm')
+
+# URL prefixes of Imgur links
+_IMGUR_PREFIXES = (
+    'http://imgur.com', 'https://imgur.com',
+    'http://i.imgur.com', 'https://i.imgur.com',
+    'http://m.imgur.com', 'https://m.imgur.com',
+    'http://www.imgur.com', 'https://www.imgur.com',
+)
+
+# Background prefetch of the most frequently picked subreddits
+PREFETCH_INTERVAL = 60  # seconds between prefetch passes
+PREFETCH_MIN_INTERVAL = 10  # lower bound on the prefetch thread's wake rate
+PREFETCH_TOP_K = 10  # number of hot subreddits to keep warm
+PREFETCH_WINDOW = 300  # refresh entries within 5 minutes of expiring
+
+# How often each subreddit has been picked, and when it was last picked, used to find the hot set
+# Subreddits not picked within CACHE_EXPIRATION are dropped from both (guarded by _cache_lock)
+_ACCESS_COUNT = Counter()
+_LAST_PICKED = {}
+
+# Serializes cache writes between request threads and the prefetch thread
+_cache_lock = threading.Lock()
+
+# Set to stop the prefetch thread (kill switch for tests and shutdown)
+_prefetch_stop = threading.Event()
+
+# Descriptive user agent that follows Reddit's API guidelines
+REDDIT_USER_AGENT = "Goon/1.0 (Windows; standalone app using user-supplied credentials)"
+
+# Name of the strategy that created the current Reddit instance
+_INIT_STRATEGY = None
+
+# Prepared listing requests for the custom client, keyed by (subreddit, endpoint, limit)
+_REQ_CACHE = OrderedDict()
+MAX_REQ_CACHE_ENTRIES = 256
+
+# Guards _REQ_CACHE, which request threads and the prefetch thread both update
+_req_cache_lock = threading.Lock()
+
+class _SubmissionProxy:
+    """
+    Submission-like object with all the attributes
+    that the get_reddit_content function expects.
+    """
+    def __init__(self, data):
+        self.id = data.get('id', '')
+        self.title = data.get('title', '')
+        self.url = data.get('url', '')
+        self.permalink = data.get('permalink', '')
+        self.stickied = data.get('stickied', False)
+        self.over_18 = data.get('over_18', False)
+        self.is_video = data.get('is_video', False)
+        self.is_self = data.get('is_self', False)
+        self.selftext = data.get('selftext', '')
+        self.created_utc = data.get('created_utc', 0)
+        self.score = data.get('score', 0)
+        self.num_comments = data.get('num_comments', 0)
+        self.author = data.get('author', '')
+        self.subreddit = data.get('subreddit', '')
+        self.domain = data.get('domain', '')
+        self.name = data.get('name', '')
+        self.preview = data.get('preview', {})
+        self.media = data.get('media', {})
+        self.secure_media = data.get('secure_media', {})
+        self.post_hint = data.get('post_hint', '')
+        
+        # Handle media metadata for gallery posts
+        self.is_gallery = data.get('is_gallery', False)
+        self.media_metadata = data.get('media_metadata', {})
+        self.gallery_data = data.get('gallery_data', {})
+        
+        # Add any additional attributes needed
+        self._data = data  # Store the original data for reference
+
+class _CustomSubreddit:
+    """Simple subreddit object for the custom Reddit client."""
+    def __init__(self, reddit, display_name):
+        self.reddit = reddit
+        self.display_name = display_name
+    
+    def _get_listings(self, endpoint, limit=25):
+        key = (self.display_name, endpoint, limit)
+        
+        try:
+            # Reuse the prepared request so the URL and params are only encoded once
+            with _req_cache_lock:
+                prepared = _REQ_CACHE.get(key)
+                if prepared is not None:
+                    _REQ_CACHE.move_to_end(key)
+            if prepared is None:
+                import requests
+                url = f"https://oauth.reddit.com/r/{self.display_name}/{endpoint}"
+                prepared = requests.Request('GET', url, params={'limit': limit}).prepare()
+                with _req_cache_lock:
+                    _REQ_CACHE[key] = prepared
+                    while len(_REQ_CACHE) > MAX_REQ_CACHE_ENTRIES:
+                        _REQ_CACHE.popitem(last=False)
+            
+            # send() doesn't merge session headers, so apply the current token and user agent
+            request = prepared.copy()
+            request.headers.update(self.reddit.session.headers)
+            response = self.reddit.session.send(request, timeout=16)
+            response.raise_for_status()
+            data = response.json()
+            
+            # Convert raw API data to submission-like objects
+            return [_SubmissionProxy(post['data']) for post in data['data']['children']]
+        except Exception as e:
+            logger.error(f"Error fetching {endpoint} for r/{self.display_name}: {str(e)}")
+            return []
+    
+    def hot(self, limit=25):
+        return self._get_listings('hot', limit)
+    
+    def new(self, limit=25):
+        return self._get_listings('new', limit)
+    
+    def top(self, time_filter='day', limit=25):
+        return self._get_listings(f'top?t={time_filter}', limit)
+
+class _CustomRedditClient:
+    """
+    Custom Reddit client that doesn't rely on PRAW's internals.
+    This is a simplified version that only supports the features we need.
+    """
+    def __init__(self, client_id, client_secret, user_agent):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.user_agent = user_agent
+        self._read_only = True
+        
+        # Import requests directly to avoid PRAW's request handling
+        import requests
+        from base64 import b64encode
+        
+        # Set up the session
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = user_agent
+        
+        # Get the access token
+        auth = b64encode(f"{client_id}:{client_secret}".encode()).decode()
+        headers = {
+            'Authorization': f'Basic {auth}',
+            'User-Agent': user_agent
+        }
+        data = {'grant_type': 'client_credentials'}
+        
+        try:
+            response = self.session.post(
+                'https://www.reddit.com/api/v1/access_token',
+                headers=headers,
+                data=data
+            )
+            response.raise_for_status()
+            self.token_data = response.json()
+            self.session.headers['Authorization'] = f"Bearer {self.token_data['access_token']}"
+            logger.info("Successfully obtained Reddit API token")
+        except Exception as e:
+            logger.error(f"Failed to get Reddit API token: {str(e)}")
+            raise
+    
+    @property
+    def read_only(self):
+        return self._read_only
+    
+    def subreddit(self, display_name):
+        return _CustomSubreddit(self, display_name)
+
+def _try_custom_reddit(client_id, client_secret, user_agent):
+    """
+    Create the custom Reddit client that works around PRAW issues
+    in the executable. Returns None on failure.
+    """
+    try:
+        logger.info("Running as executable, using custom Reddit wrapper implementation")
+        reddit_instance = _CustomRedditClient(client_id, client_secret, user_agent)
+        logger.info("Successfully created custom Reddit client for executable environment")
+        return reddit_instance
+    except Exception as e:
+        logger.error(f"Custom Reddit implementation failed: {str(e)}")
+        return None
+
+def _try_praw_patched(client_id, client_secret, user_agent):
+    """
+    Create a standard PRAW instance with the executable workarounds applied.
+    Returns None on failure.
+    """
+    try:
+        logger.info("Falling back to standard PRAW with additional error handling")
+        
+        # Monkey patch PRAW if needed
+        if not hasattr(praw_module.Reddit, '_prepare_objector'):
+            praw_module.Reddit._prepare_objector = lambda self: None
+        
+        # Create a Reddit instance with minimal arguments
+        reddit_instance = praw_module.Reddit(
+            client_id=client_id,
+            client_secret=client_secret,
+            user_agent=user_agent
+        )
+        
+        # Force read-only mode
+        reddit_instance._read_only = True
+        
+        logger.info("Successfully created PRAW Reddit instance with error handling")
+        return reddit_instance
+    except Exception as e:
+        logger.error(f"Patched PRAW initialization failed: {str(e)}")
+        return None
+
+def _try_praw_config(client_id, client_secret, user_agent):
+    """
+    Create a PRAW instance from an explicit minimal config.
+    Returns None on failure.
+    """
+    try:
+        from praw.config import Config
+        
+        # Create a minimal config object
+        config = {
+            'client_id': client_id,
+            'client_secret': client_secret,
+            'user_agent': user_agent,
+            'check_for_updates': False,
+            'comment_kind': 't1',
+            'message_kind': 't4',
+            'redditor_kind': 't2',
+            'submission_kind': 't3',
+            'subreddit_kind': 't5',
+            'trophy_kind': 't6',
+            'oauth_url': 'https://oauth.reddit.com',
+            'reddit_url': 'https://www.reddit.com',
+            'short_url': 'https://redd.it',
+            'timeout': 16
+        }
+        
+        # Create a Config object directly - convert dict to a hashable format
+        praw_config = Config({str(k): str(v) for k, v in config.items()})
+        
+        # Create a Reddit instance with this config
+        reddit_instance = praw_module.Reddit(config=praw_config)
+        
+        # Verify it works by accessing a property
+        _ = reddit_instance.read_only
+        
+        logger.info("Successfully created Reddit instance")
+        return reddit_instance
+    except Exception as e:
+        logger.error(f"Failed to create Reddit instance with config: {str(e)}")
+        return None
+
+def _try_praw_basic(client_id, client_secret, user_agent):
+    """
+    Create a PRAW instance with the most basic approach.
+    Returns None on failure.
+    """
+    try:
+        logger.info("Trying most basic Reddit initialization")
+        reddit_instance = praw_module.Reddit(
+            client_id=client_id,
+            client_secret=client_secret,
+            user_agent=user_agent
+        )
+        logger.info("Successfully created Reddit instance with basic approach")
+        return reddit_instance
+    except Exception as e:
+        logger.error(f"Basic initialization also failed: {str(e)}")
+        return None
+
+# Initialization strategies, tried in order until one returns an instance
+_FROZEN_STRATEGIES = (_try_custom_reddit, _try_praw_patched)
+_STRATEGIES = (_try_praw_config, _try_praw_basic)
+
 def create_reddit_instance(credentials):
     """
     Create a PRAW Reddit instance using credentials dictionary.
-    Uses a direct approach that bypasses PRAW's normal initialization process.
+    Tries each initialization strategy in order and returns the first that works.
     
     Args:
         credentials (dict): Dictionary containing Reddit API credentials
@@ -51,6 +333,8 @@ def create_reddit_instance(credentials):
     Returns:
         praw.Reddit or None: Reddit instance or None if initialization fails
     """
+    global _INIT_STRATEGY
+    
     try:
         # Extract and validate credentials
         if not credentials or not isinstance(credentials, dict):
@@ -62,18 +346,9 @@ def create_reddit_instance(credentials):
         client_secret = credentials.get('client_secret', '')
         
         # Convert to strings and strip whitespace
-        if client_id is not None:
-            client_id = str(client_id).strip()
-        else:
-            client_id = ''
-            
-        if client_secret is not None:
-            client_secret = str(client_secret).strip()
-        else:
-            client_secret = ''
-        
-        # Use a descriptive user agent that follows Reddit's API guidelines
-        user_agent = "Goon/1.0 (Windows; standalone app using user-supplied credentials)"
+        client_id = str(client_id).strip() if client_id is not None else ''
+        client_secret = str(client_secret).strip() if client_secret is not None else ''
+        user_agent = REDDIT_USER_AGENT
         
         # Check for empty values
         if not client_id or not client_secret:
@@ -85,261 +360,18 @@ def create_reddit_instance(credentials):
                    f"client_secret length: {len(client_secret)}, "
                    f"user_agent: {user_agent}")
         
-        # Check if we're running as an executable
+        # The executable uses a custom approach that works around PRAW issues
         import sys
-        is_frozen = getattr(sys, 'frozen', False)
+        strategies = _FROZEN_STRATEGIES if getattr(sys, 'frozen', False) else _STRATEGIES
         
-        # If running as an executable, use a custom approach that works around PRAW issues
-        if is_frozen:
-            try:
-                logger.info("Running as executable, using custom Reddit wrapper implementation")
-                
-                # Create a custom Reddit client that doesn't rely on PRAW's internals
-                # This is a simplified version that only supports the features we need
-                class CustomRedditClient:
-                    def __init__(self, client_id, client_secret, user_agent):
-                        self.client_id = client_id
-                        self.client_secret = client_secret
-                        self.user_agent = user_agent
-                        self._read_only = True
-                        
-                        # Import requests directly to avoid PRAW's request handling
-                        import requests
-                        from base64 import b64encode
-                        
-                        # Set up the session
-                        self.session = requests.Session()
-                        self.session.headers['User-Agent'] = user_agent
-                        
-                        # Get the access token
-                        auth = b64encode(f"{client_id}:{client_secret}".encode()).decode()
-                        headers = {
-                            'Authorization': f'Basic {auth}',
-                            'User-Agent': user_agent
-                        }
-                        data = {'grant_type': 'client_credentials'}
-                        
-                        try:
-                            response = self.session.post(
-                                'https://www.reddit.com/api/v1/access_token',
-                                headers=headers,
-                                data=data
-                            )
-                            response.raise_for_status()
-                            self.token_data = response.json()
-                            self.session.headers['Authorization'] = f"Bearer {self.token_data['access_token']}"
-                            logger.info("Successfully obtained Reddit API token")
-                        except Exception as e:
-                            logger.error(f"Failed to get Reddit API token: {str(e)}")
-                            raise
-                    
-                    @property
-                    def read_only(self):
-                        return self._read_only
-                    
-                    def subreddit(self, display_name):
-                        # Create a simple subreddit object
-                        class CustomSubreddit:
-                            def __init__(self, reddit, display_name):
-                                self.reddit = reddit
-                                self.display_name = display_name
-                            
-                            def _get_listings(self, endpoint, limit=25):
-                                url = f"https://oauth.reddit.com/r/{self.display_name}/{endpoint}"
-                                params = {'limit': limit}
-                                
-                                try:
-                                    response = self.reddit.session.get(url, params=params)
-                                    response.raise_for_status()
-                                    data = response.json()
-                                    
-                                    # Convert raw API data to submission-like objects
-                                    submissions = []
-                                    for post in data['data']['children']:
-                                        post_data = post['data']
-                                        
-                                        # Create a submission-like object with all the attributes
-                                        # that the get_reddit_content function expects
-                                        class SubmissionProxy:
-                                            def __init__(self, data):
-                                                self.id = data.get('id', '')
-                                                self.title = data.get('title', '')
-                                                self.url = data.get('url', '')
-                                                self.permalink = data.get('permalink', '')
-                                                self.stickied = data.get('stickied', False)
-                                                self.over_18 = data.get('over_18', False)
-                                                self.is_video = data.get('is_video', False)
-                                                self.is_self = data.get('is_self', False)
-                                                self.selftext = data.get('selftext', '')
-                                                self.created_utc = data.get('created_utc', 0)
-                                                self.score = data.get('score', 0)
-                                                self.num_comments = data.get('num_comments', 0)
-                                                self.author = data.get('author', '')
-                                                self.subreddit = data.get('subreddit', '')
-                                                self.domain = data.get('domain', '')
-                                                self.name = data.get('name', '')
-                                                self.preview = data.get('preview', {})
-                                                self.media = data.get('media', {})
-                                                self.secure_media = data.get('secure_media', {})
-                                                self.post_hint = data.get('post_hint', '')
-                                                
-                                                # Handle media metadata for gallery posts
-                                                self.is_gallery = data.get('is_gallery', False)
-                                                self.media_metadata = data.get('media_metadata', {})
-                                                self.gallery_data = data.get('gallery_data', {})
-                                                
-                                                # Add any additional attributes needed
-                                                self._data = data  # Store the original data for reference
-                                        
-                                        submissions.append(SubmissionProxy(post_data))
-                                    
-                                    return submissions
-                                except Exception as e:
-                                    logger.error(f"Error fetching {endpoint} for r/{self.display_name}: {str(e)}")
-                                    return []
-                            
-                            def hot(self, limit=25):
-                                return self._get_listings('hot', limit)
-                            
-                            def new(self, limit=25):
-                                return self._get_listings('new', limit)
-                            
-                            def top(self, time_filter='day', limit=25):
-                                return self._get_listings(f'top?t={time_filter}', limit)
-                        
-                        return CustomSubreddit(self, display_name)
-                
-                # Create and return our custom Reddit client
-                reddit_instance = CustomRedditClient(client_id, client_secret, user_agent)
-                logger.info("Successfully created custom Reddit client for executable environment")
+        for strategy in strategies:
+            reddit_instance = strategy(client_id, client_secret, user_agent)
+            if reddit_instance is not None:
+                _INIT_STRATEGY = strategy.__name__
                 return reddit_instance
-            except Exception as e:
-                logger.error(f"Custom Reddit implementation failed: {str(e)}")
-                
-                # If our custom implementation fails, try the standard PRAW approach
-                # but with additional error handling
-                try:
-                    import praw
-                    logger.info("Falling back to standard PRAW with additional error handling")
-                    
-                    # We need to create a custom Config class to avoid the '_NotSet' error
-                    class CustomConfig:
-                        def __init__(self, **settings):
-                            self._settings = settings
-                            
-                        def __getitem__(self, key):
-                            return self._settings.get(key, '')
-                    
-                    # Create a custom configuration
-                    custom_config = CustomConfig(
-                        client_id=client_id,
-                        client_secret=client_secret,
-                        user_agent=user_agent,
-                        check_for_updates='False',
-                        comment_kind='t1',
-                        message_kind='t4',
-                        redditor_kind='t2',
-                        submission_kind='t3',
-                        subreddit_kind='t5',
-                        trophy_kind='t6',
-                        oauth_url='https://oauth.reddit.com',
-                        reddit_url='https://www.reddit.com',
-                        short_url='https://redd.it',
-                        timeout='16'
-                    )
-                    
-                    # Monkey patch PRAW if needed
-                    if not hasattr(praw.Reddit, '_prepare_objector'):
-                        praw.Reddit._prepare_objector = lambda self: None
-                    
-                    # Create a Reddit instance with minimal arguments
-                    reddit_instance = praw.Reddit(
-                        client_id=client_id,
-                        client_secret=client_secret,
-                        user_agent=user_agent
-                    )
-                    
-                    # Force read-only mode
-                    reddit_instance._read_only = True
-                    
-                    logger.info("Successfully created PRAW Reddit instance with error handling")
-                    return reddit_instance
-                except Exception as praw_e:
-                    logger.error(f"All Reddit initialization methods failed: {str(praw_e)}")
-                    return None
-        
-        # Standard approach for non-executable environments
-        # Import PRAW directly
-        import praw
-        from praw.config import Config
-        
-        try:
-            from praw.util.token_manager import TokenManager
-        except ImportError as e:
-            logger.warning(f"Could not import TokenManager: {str(e)}. Creating fallback implementation.")
-            
-            # Create a minimal fallback implementation of TokenManager
-            class TokenManager:
-                def __init__(self, authorizer):
-                    self._authorizer = authorizer
-                    self._access_token = None
-                    self._expiration = 0
-                
-                def authorized_client(self):
-                    # Return a simple object that can be used as a placeholder
-                    class DummyClient:
-                        def request(self, *args, **kwargs):
-                            return {"data": {}}
-                    return DummyClient()
-        
-        # Create a minimal config object
-        config = {
-            'client_id': client_id,
-            'client_secret': client_secret,
-            'user_agent': user_agent,
-            'check_for_updates': False,
-            'comment_kind': 't1',
-            'message_kind': 't4',
-            'redditor_kind': 't2',
-            'submission_kind': 't3',
-            'subreddit_kind': 't5',
-            'trophy_kind': 't6',
-            'oauth_url': 'https://oauth.reddit.com',
-            'reddit_url': 'https://www.reddit.com',
-            'short_url': 'https://redd.it',
-            'timeout': 16
-        }
         
-        # Create the Reddit instance with minimal configuration
-        try:
-            # Create a Config object directly - convert dict to a hashable format
-            praw_config = Config({str(k): str(v) if isinstance(v, (str, bool, int, float)) else str(v) 
-                                 for k, v in config.items()})
-            
-            # Create a Reddit instance with this config
-            reddit_instance = praw.Reddit(config=praw_config)
-            
-            # Verify it works by accessing a property
-            _ = reddit_instance.read_only
-            
-            logger.info("Successfully created Reddit instance")
-            return reddit_instance
-        except Exception as e:
-            logger.error(f"Failed to create Reddit instance with config: {str(e)}")
-            
-            # Last resort: try the most basic approach
-            try:
-                logger.info("Trying most basic Reddit initialization")
-                reddit_instance = praw.Reddit(
-                    client_id=client_id,
-                    client_secret=client_secret,
-                    user_agent=user_agent
-                )
-                logger.info("Successfully created Reddit instance with basic approach")
-                return reddit_instance
-            except Exception as basic_e:
-                logger.error(f"Basic initialization also failed: {str(basic_e)}")
-                return None
+        logger.error("All Reddit initialization methods failed")
+        return None
     except Exception as e:
         logger.error(f"Unexpected error in create_reddit_instance: {str(e)}")
         return None
@@ -349,7 +381,7 @@ def get_reddit_instance():
     Initialize or return the global Reddit instance.
     Returns None if initialization fails.
     """
-    global reddit, LAST_REDDIT_INIT
+    global reddit, LAST_REDDIT_INIT, _reddit_cred_hash
     import sys
     
     try:
@@ -422,6 +454,14 @@ def get_reddit_instance():
             # Pass the entire credentials dictionary to the create_reddit_instance function
             reddit = create_reddit_instance(credentials)
             
+            # Remember which credentials the live client was built from, so
+            # update_credentials can tell whether a submission actually differs
+            _reddit_cred_hash = hash((
+                credentials.get('client_id', ''),
+                credentials.get('client_secret', ''),
+                credentials.get('user_agent', 'Goon/1.0')
+            )) if reddit else None
+            
             if reddit:
                 # Update the last initialization timestamp
                 LAST_REDDIT_INIT = current_time
@@ -438,6 +478,142 @@ def get_reddit_instance():
         logger.error(f"Unexpected error in get_reddit_instance: {str(e)}")
         return None
 
+def _refresh_subreddit(clean_sub, reddit_instance=None):
+    """
+    Fetch fresh submissions for a subreddit and store them in the cache.
+    Returns the list of submissions.
+
+    Args:
+        clean_sub (str): Cleaned subreddit name (cache key)
+        reddit_instance: Reddit client to use, defaults to the global instance
+    """
+    reddit_instance = reddit_instance or reddit
+    current_time = time.time()
+
+    subreddit = reddit_instance.subreddit(clean_sub)
+    logger.info("Successfully accessed subreddit: r/%s", clean_sub)
+
+    # Use a smarter approach to fetching submissions
+    # First try hot submissions (most efficient API call)
+    submissions = list(subreddit.hot(limit=30))
+    submission_type = 'hot'
+    logger.info("Got %d hot submissions from r/%s", len(submissions), clean_sub)
+
+    # Only make additional API calls if we really need to
+    if len(submissions) < MIN_SUBMISSIONS_THRESHOLD:
+        # Decide randomly between new and top to add variety while reducing API calls
+        if random.random() < 0.5:
+            logger.info("Not enough hot submissions for r/%s, trying new", clean_sub)
+            new_submissions = list(subreddit.new(limit=20))  # Reduced limit to save API calls
+            submissions.extend(new_submissions)
+            submission_type = 'hot+new'
+            logger.info("Added %d new submissions", len(new_submissions))
+        else:
+            logger.info("Not enough hot submissions for r/%s, trying top", clean_sub)
+            top_submissions = list(subreddit.top(limit=20))  # Reduced limit to save API calls
+            submissions.extend(top_submissions)
+            submission_type = 'hot+top'
+            logger.info("Added %d top submissions", len(top_submissions))
+
+    # Update the cache with appropriate expiration based on result quality
+    cache_expiration = _CACHE_EXPIRATIONS[len(submissions) >= MIN_SUBMISSIONS_THRESHOLD]
+
+    with _cache_lock:
+        # Manage cache size - remove least recently used entries if we're at the limit
+        if clean_sub not in reddit_cache:
+            while len(reddit_cache) >= MAX_CACHE_ENTRIES:
+                oldest_sub, _ = reddit_cache.popitem(last=False)
+                logger.info("Removing least recently used cache entry for r/%s", oldest_sub)
+
+        # Store in cache
+        reddit_cache[clean_sub] = {
+            'submissions': submissions,
+            'last_updated': current_time,
+            'type': submission_type,
+            'expiration': cache_expiration
+        }
+        reddit_cache.move_to_end(clean_sub)
+    logger.info("Updated cache for r/%s with %d submissions, expires in %.1f minutes",
+                clean_sub, len(submissions), cache_expiration / 60)
+
+    return submissions
+
+def _prefetch_hot_subreddits():
+    """
+    Refresh the cache for the most frequently picked subreddits
+    whose entries are about to expire.
+    """
+    # Never initialize a client from the background; only reuse an existing one
+    reddit_instance = reddit
+    if reddit_instance is None:
+        return
+
+    current_time = time.time()
+
+    # Forget subreddits that haven't been picked recently, then snapshot the hot set
+    with _cache_lock:
+        for clean_sub in [sub for sub, picked_at in _LAST_PICKED.items()
+                          if current_time - picked_at > CACHE_EXPIRATION]:
+            del _LAST_PICKED[clean_sub]
+            del _ACCESS_COUNT[clean_sub]
+        hot_subreddits = [sub for sub, _ in _ACCESS_COUNT.most_common(PREFETCH_TOP_K)]
+
+    for clean_sub in hot_subreddits:
+        if _prefetch_stop.is_set():
+            return
+
+        cache_entry = reddit_cache.get(clean_sub)
+        if cache_entry is None:
+            continue
+
+        # Empty, short or failed fetches get a short expiration and are never served as cache hits,
+        # so refreshing them early would only repeat the API calls
+        expiration = cache_entry.get('expiration', CACHE_EXPIRATION)
+        if not cache_entry['submissions'] or expiration <= PREFETCH_WINDOW:
+            continue
+
+        # Only refresh entries that are still live but about to expire
+        expires_at = cache_entry['last_updated'] + expiration
+        if expires_at <= current_time or expires_at - current_time > PREFETCH_WINDOW:
+            continue
+
+        logger.info(f"Prefetching r/{clean_sub} before its cache entry expires")
+        try:
+            _refresh_subreddit(clean_sub, reddit_instance)
+        except Exception as e:
+            logger.warning(f"Prefetch failed for r/{clean_sub}: {str(e)}")
+
+def _prefetch_loop():
+    """Background loop that keeps the hot subreddits warm in the cache."""
+    interval = max(PREFETCH_INTERVAL, PREFETCH_MIN_INTERVAL)
+    while not _prefetch_stop.wait(interval):
+        try:
+            _prefetch_hot_subreddits()
+        except Exception as e:
+            logger.error(f"Unexpected error in prefetch loop: {str(e)}")
+
+def stop_prefetch():
+    """Stop the background prefetch thread."""
+    _prefetch_stop.set()
+
+def _punishment_names(punishments):
+    """
+    Return the set of cleaned punishment subreddit names.
+    Handles both object format and string format items.
+    """
+    names = (p.get('name') if isinstance(p, dict) else p for p in punishments)
+    return frozenset(clean_subreddit_name(name) for name in names if isinstance(name, str))
+
+def _json_response(data):
+    """
+    Build a JSON response for the content endpoint.
+    Serializes with orjson when available, otherwise uses jsonify.
+    """
+    if orjson is None:
+        return jsonify(data)
+    body = json_dumps(data, indent=False)
+    return Response(body, mimetype='application/json', headers={'Content-Length': str(len(body))})
+
 def get_reddit_content(favorites, punishments, timer_seconds, metronome_speed, use_punishment=False, punishments_enabled=True):
     """
     Get content from Reddit based on user preferences.
@@ -447,9 +623,11 @@ def get_reddit_content(favorites, punishments, timer_seconds, metronome_speed, u
     
     try:
         # Log the request parameters (without sensitive info)
-        logger.info(f"Getting Reddit content. Favorites count: {len(favorites) if favorites else 0}, "
-                   f"Punishments count: {len(punishments) if punishments else 0}, "
-                   f"Timer: {timer_seconds}s, Use punishment: {use_punishment}")
+        logger.info("Getting Reddit content. Favorites count: %d, Punishments count: %d, "
+                   "Timer: %ss, Use punishment: %s",
+                   len(favorites) if favorites else 0,
+                   len(punishments) if punishments else 0,
+                   timer_seconds, use_punishment)
         
         # Always reinitialize Reddit instance to ensure fresh credentials
         reddit = get_reddit_instance()
@@ -465,9 +643,9 @@ def get_reddit_content(favorites, punishments, timer_seconds, metronome_speed, u
             has_client_id = bool(credentials.get('client_id'))
             has_client_secret = bool(credentials.get('client_secret'))
             
-            logger.info(f"Debug - Credentials present: {has_credentials}, "
-                       f"client_id present: {has_client_id}, "
-                       f"client_secret present: {has_client_secret}")
+            logger.info("Debug - Credentials present: %s, client_id present: %s, "
+                       "client_secret present: %s",
+                       has_credentials, has_client_id, has_client_secret)
             
             # Provide a more helpful error message based on the state of credentials
             error_message = "Failed to initialize Reddit client"
@@ -504,15 +682,18 @@ def get_reddit_content(favorites, punishments, timer_seconds, metronome_speed, u
         if not isinstance(punishments, list):
             punishments = []
         
+        # Normalize punishment names once so the punishment check is a set lookup
+        punishment_names = _punishment_names(punishments)
+        
         # Determine which list to use based on use_punishment flag
         if use_punishment and punishments_enabled and punishments:
             # Use punishments list
             subreddits_list = punishments
-            logger.info(f"Using punishments list with {len(punishments)} items")
+            logger.info("Using punishments list with %d items", len(punishments))
         else:
             # Use favorites list
             subreddits_list = favorites
-            logger.info(f"Using favorites list with {len(favorites)} items")
+            logger.info("Using favorites list with %d items", len(favorites))
         
         # Filter out disabled subreddits (handle both dictionary and string items)
         enabled_subreddits = []
@@ -521,7 +702,7 @@ def get_reddit_content(favorites, punishments, timer_seconds, metronome_speed, u
                 enabled_subreddits.append(s)
             elif isinstance(s, str):
                 enabled_subreddits.append({'name': s, 'enabled': True})
-        logger.info(f"Found {len(enabled_subreddits)} enabled subreddits")
+        logger.info("Found %d enabled subreddits", len(enabled_subreddits))
         
         if not enabled_subreddits:
             return jsonify({
@@ -531,7 +712,7 @@ def get_reddit_content(favorites, punishments, timer_seconds, metronome_speed, u
         # Select a random subreddit from the enabled ones
         selected = random.choice(enabled_subreddits)
         selected_sub = selected.get('name', '').strip()
-        logger.info(f"Selected subreddit: {selected_sub}")
+        logger.info("Selected subreddit: %s", selected_sub)
         
         if not selected_sub:
             return jsonify({
@@ -540,13 +721,18 @@ def get_reddit_content(favorites, punishments, timer_seconds, metronome_speed, u
         
         # Clean the subreddit name (remove r/ prefix if present)
         clean_sub = clean_subreddit_name(selected_sub)
-        logger.info(f"Cleaned subreddit name: {clean_sub}")
+        logger.info("Cleaned subreddit name: %s", clean_sub)
         
         if not clean_sub:
             return jsonify({
                 'error': f'Invalid subreddit name: {selected_sub}. Please check your subreddits list.'
             }), 400
         
+        # Track picks so the prefetch thread knows which subreddits are hot
+        with _cache_lock:
+            _ACCESS_COUNT[clean_sub] += 1
+            _LAST_PICKED[clean_sub] = time.time()
+        
         # Get the subreddit and submissions (with caching)
         submissions = []
         try:
@@ -562,135 +748,91 @@ def get_reddit_content(favorites, punishments, timer_seconds, metronome_speed, u
                 # Use cache if it's not expired
                 if cache_age < cache_expiration and cache_entry['submissions']:
                     submissions = cache_entry['submissions']
-                    logger.info(f"Using cached {len(submissions)} submissions for r/{clean_sub}, age: {cache_age:.1f} seconds, expires in {(cache_expiration-cache_age)/60:.1f} minutes")
+                    with _cache_lock:
+                        if clean_sub in reddit_cache:
+                            reddit_cache.move_to_end(clean_sub)
+                    logger.info("Using cached %d submissions for r/%s, age: %.1f seconds, expires in %.1f minutes",
+                                len(submissions), clean_sub, cache_age, (cache_expiration - cache_age) / 60)
                     cache_hit = True
                     
                     # Refresh cache in the background if it's getting old (over 75% of expiration time)
                     if cache_age > (cache_expiration * 0.75):
-                        logger.info(f"Cache for r/{clean_sub} is getting old, will refresh on next request")
+                        logger.info("Cache for r/%s is getting old, will refresh on next request", clean_sub)
                         # We don't actually refresh here to avoid API call on this request
                         # Just mark it as expired so next request will refresh
             
             # If no cache hit, fetch from Reddit API
             if not cache_hit:
-                logger.info(f"Cache miss for r/{clean_sub}, fetching from Reddit API")
-                subreddit = reddit.subreddit(clean_sub)
-                logger.info(f"Successfully accessed subreddit: r/{clean_sub}")
-                
-                # Use a smarter approach to fetching submissions
-                # First try hot submissions (most efficient API call)
-                submissions = list(subreddit.hot(limit=30))
-                submission_type = 'hot'
-                logger.info(f"Got {len(submissions)} hot submissions from r/{clean_sub}")
-                
-                # Only make additional API calls if we really need to
-                if len(submissions) < MIN_SUBMISSIONS_THRESHOLD:
-                    # Decide randomly between new and top to add variety while reducing API calls
-                    if random.random() < 0.5:
-                        logger.info(f"Not enough hot submissions for r/{clean_sub}, trying new")
-                        new_submissions = list(subreddit.new(limit=20))  # Reduced limit to save API calls
-                        submissions.extend(new_submissions)
-                        submission_type = 'hot+new'
-                        logger.info(f"Added {len(new_submissions)} new submissions")
-                    else:
-                        logger.info(f"Not enough hot submissions for r/{clean_sub}, trying top")
-                        top_submissions = list(subreddit.top(limit=20))  # Reduced limit to save API calls
-                        submissions.extend(top_submissions)
-                        submission_type = 'hot+top'
-                        logger.info(f"Added {len(top_submissions)} top submissions")
-                
-                # Update the cache with appropriate expiration based on result quality
-                cache_expiration = CACHE_EXPIRATION if len(submissions) >= MIN_SUBMISSIONS_THRESHOLD else CACHE_EXPIRATION_EMPTY
-                
-                # Manage cache size - remove oldest entry if we're at the limit
-                if len(reddit_cache) >= MAX_CACHE_ENTRIES:
-                    oldest_sub = None
-                    oldest_time = float('inf')
-                    for sub, data in reddit_cache.items():
-                        if data['last_updated'] < oldest_time:
-                            oldest_time = data['last_updated']
-                            oldest_sub = sub
-                    if oldest_sub:
-                        logger.info(f"Removing oldest cache entry for r/{oldest_sub}")
-                        del reddit_cache[oldest_sub]
-                
-                # Store in cache
-                reddit_cache[clean_sub] = {
-                    'submissions': submissions,
-                    'last_updated': current_time,
-                    'type': submission_type,
-                    'expiration': cache_expiration
-                }
-                logger.info(f"Updated cache for r/{clean_sub} with {len(submissions)} submissions, expires in {cache_expiration/60:.1f} minutes")
+                logger.info("Cache miss for r/%s, fetching from Reddit API", clean_sub)
+                submissions = _refresh_subreddit(clean_sub)
         except Exception as e:
-            logger.error(f"Error accessing subreddit r/{clean_sub}: {str(e)}")
+            logger.error("Error accessing subreddit r/%s: %s", clean_sub, e)
             return jsonify({
                 'error': f'Error accessing subreddit r/{clean_sub}: {str(e)}'
             }), 500
         
-        # Filter out stickied posts and self posts
-        filtered_submissions = [s for s in submissions if not s.stickied and not s.is_self]
-        logger.info(f"Filtered to {len(filtered_submissions)} suitable submissions")
+        # Select a random submission, skipping stickied posts and self posts
+        # (single-pass reservoir sampling, so no filtered list is built)
+        random_post = None
+        suitable_count = 0
+        for s in submissions:
+            if s.stickied or s.is_self:
+                continue
+            suitable_count += 1
+            if random.random() * suitable_count < 1:
+                random_post = s
+        logger.info("Filtered to %d suitable submissions", suitable_count)
         
-        if not filtered_submissions:
-            logger.warning(f"No suitable submissions found for r/{clean_sub}")
+        if random_post is None:
+            logger.warning("No suitable submissions found for r/%s", clean_sub)
             return jsonify({
                 'error': f'No suitable content found in r/{clean_sub}. Please try again or select a different subreddit.'
             }), 404
         
-        # Select a random submission
-        random_post = random.choice(filtered_submissions)
-        logger.info(f"Selected random post: {random_post.title[:50]}...")
-        
         # Handle gallery posts
         gallery_images = []
         post_url = ""
         try:
-            if hasattr(random_post, 'is_gallery') and random_post.is_gallery:
-                logger.info(f"Post is a gallery, extracting images")
+            # Read the post attributes once; PRAW attribute access can trigger lazy loading
+            is_gallery = bool(getattr(random_post, 'is_gallery', False))
+            post_title = getattr(random_post, 'title', '') or ''
+            logger.info("Selected random post: %.50s...", post_title)
+            
+            if is_gallery:
+                logger.info("Post is a gallery, extracting images")
                 # Extract images from gallery
-                if hasattr(random_post, 'media_metadata'):
-                    for media_id, media_item in random_post.media_metadata.items():
-                        if media_item['e'] == 'Image':
-                            if 's' in media_item and 'u' in media_item['s']:
-                                gallery_images.append(media_item['s']['u'])
+                media_metadata = getattr(random_post, 'media_metadata', None) or {}
+                gallery_images = [
+                    m['s']['u']
+                    for m in media_metadata.values()
+                    if m.get('e') == 'Image' and 'u' in m.get('s', {})
+                ]
                 
-                logger.info(f"Extracted {len(gallery_images)} images from gallery")
+                logger.info("Extracted %d images from gallery", len(gallery_images))
                 
                 # For gallery posts with images, we'll send all images to the frontend
                 # but still set post_url to the first image or original URL for backward compatibility
                 if gallery_images:
                     post_url = gallery_images[0]  # Use first image as main post_url for backward compatibility
-                    logger.info(f"Using first gallery image as main URL: {post_url}")
+                    logger.info("Using first gallery image as main URL: %s", post_url)
                 else:
                     # Fallback to the post URL if we couldn't extract gallery images
                     post_url = random_post.url
-                    logger.info(f"Couldn't extract gallery images, using post URL: {post_url}")
+                    logger.info("Couldn't extract gallery images, using post URL: %s", post_url)
             else:
                 # Not a gallery, use the post URL directly
                 post_url = random_post.url
-                logger.info(f"Using direct post URL: {post_url}")
+                logger.info("Using direct post URL: %s", post_url)
                 
             # Handle special cases for certain domains
-            if 'imgur.com' in post_url and not any(post_url.endswith(ext) for ext in ['.jpg', '.jpeg', '.png', '.gif', '.mp4', '.webm']):
+            if post_url.startswith(_IMGUR_PREFIXES) and not post_url.endswith(_MEDIA_EXTS):
                 # Add .jpg extension to Imgur URLs without an extension
                 if not post_url.endswith('/'):
                     post_url += '.jpg'
-                    logger.info(f"Added .jpg extension to Imgur URL: {post_url}")
+                    logger.info("Added .jpg extension to Imgur URL: %s", post_url)
             
             # Determine if this is a punishment based on the subreddit
-            # First check if the selected subreddit is in the punishments list
-            is_punishment = False
-            
-            # Check if the selected subreddit is in the punishments list
-            # This handles both object format and string format
-            if isinstance(punishments, list):
-                # If punishments is a list of objects with 'name' property
-                if punishments and isinstance(punishments[0], dict) and 'name' in punishments[0]:
-                    is_punishment = any(p.get('name') == selected_sub for p in punishments)
-                # If punishments is a list of strings
-                else:
-                    is_punishment = selected_sub in punishments
+            is_punishment = clean_sub in punishment_names
         
             # Handle the punishment flag correctly
             # If use_punishment is true (we're in punishment mode) but there are no punishment subreddits,
@@ -704,39 +846,36 @@ def get_reddit_content(favorites, punishments, timer_seconds, metronome_speed, u
                     # If there are no punishment subreddits, don't mark as punishment
                     is_punishment = False
             
-            logger.info(f"Returning Reddit content, is_punishment={is_punishment}")
-            
-            # Log gallery information for debugging
-            is_gallery = hasattr(random_post, 'is_gallery') and random_post.is_gallery
-            logger.info(f"Is gallery post: {is_gallery}")
-            logger.info(f"Gallery images count: {len(gallery_images) if gallery_images else 0}")
-            logger.info(f"Gallery images: {gallery_images[:3]}{'...' if len(gallery_images) > 3 else ''}")
+            gallery_count = len(gallery_images)
             
             # Prepare response data
             response_data = {
                 'source': 'reddit',
                 'post_url': post_url,  # Use the first image URL for backward compatibility
-                'post_title': random_post.title if hasattr(random_post, 'title') else '',
+                'post_title': post_title,
                 'is_gallery': is_gallery,
-                'gallery_image_count': len(gallery_images) if gallery_images else 0,
-                'gallery_images': gallery_images if gallery_images else [],  # Send all gallery images to frontend
+                'gallery_image_count': gallery_count,
+                'gallery_images': gallery_images,  # Send all gallery images to frontend
                 'subreddit': selected_sub,
                 'timer_seconds': timer_seconds,
                 'metronome_speed': metronome_speed,
                 'isPunishment': is_punishment
             }
             
-            logger.info(f"Sending response with keys: {list(response_data.keys())}")
-            return jsonify(response_data)
+            # Log the response summary in a single record
+            logger.info("Returning Reddit content: sub=r/%s, is_punishment=%s, is_gallery=%s, "
+                        "gallery_count=%d, title=%.50s",
+                        clean_sub, is_punishment, is_gallery, gallery_count, post_title)
+            return _json_response(response_data)
         except Exception as e:
-            logger.error(f'Error processing Reddit content: {str(e)}')
+            logger.error('Error processing Reddit content: %s', e)
             return jsonify({
                 'error': 'Error processing Reddit content', 
                 'message': str(e),
                 'details': 'Error occurred while processing the selected post.'
             }), 500
     except Exception as e:
-        logger.error(f"Unexpected error in get_reddit_content: {str(e)}")
+        logger.error("Unexpected error in get_reddit_content: %s", e)
         return jsonify({
             'error': f'Unexpected error: {str(e)}'
         }), 500
@@ -746,7 +885,7 @@ def update_credentials(request):
     Update Reddit API credentials.
     Returns a JSON response indicating success or failure.
     """
-    global reddit
+    global reddit, _reddit_cred_hash
     
     data = request.json
     if not data:
@@ -775,50 +914,49 @@ def update_credentials(request):
     logger.info(f"Updating Reddit credentials - client_id present: {bool(client_id)}, "
                f"client_secret present: {bool(client_secret)}")
     
+    # Only rebuild the Reddit client when the credentials actually changed
+    new_hash = hash((client_id, client_secret, user_agent))
+    credentials_changed = reddit is None or new_hash != _reddit_cred_hash
+    
     # Save credentials to all possible locations
     success = save_credentials(credentials)
     
     # Force the global Reddit instance to be reinitialized on next use
     global LAST_REDDIT_INIT
-    LAST_REDDIT_INIT = 0  # Reset the timestamp to force reinitialization
+    if credentials_changed:
+        LAST_REDDIT_INIT = 0  # Reset the timestamp to force reinitialization
     
     if success:
         # For reset case, just set reddit to None
         if is_reset:
             reddit = None
+            _reddit_cred_hash = None
             logger.info("Reddit API credentials reset successfully")
             return jsonify({'success': True, 'message': 'Credentials reset successfully'})
         
         # For normal case, reinitialize the Reddit API client with the new credentials
         try:
-            # Validate and prepare credentials
+            # Validate and prepare credentials (already stripped above)
             default_user_agent = 'Goon/1.0'
             
-            # Clean and validate credentials
-            client_id = str(client_id).strip()
-            client_secret = str(client_secret).strip()
-            user_agent = str(user_agent).strip() if user_agent else default_user_agent
-            
-            # Check for empty credentials
-            if not client_id or not client_secret:
-                return jsonify({'error': 'Invalid credentials provided'}), 400
-                
             # Ensure user_agent is never empty
             if not user_agent:
                 user_agent = default_user_agent
             
+            # Keep the existing client when nothing changed
+            if not credentials_changed:
+                logger.info("Reddit credentials unchanged, keeping existing Reddit API client")
+                return jsonify({'success': True, 'message': 'Credentials updated successfully'})
+            
             # Create Reddit instance using our wrapper class that handles _NotSet errors
             try:
                 # Use a safer approach for PyInstaller environment
-                # Create a minimal set of parameters to avoid _NotSet issues
-                reddit_params = {
-                    'client_id': client_id,
-                    'client_secret': client_secret,
-                    'user_agent': user_agent
-                }
-                
-                # Initialize with our custom wrapper class
-                reddit = Reddit(**reddit_params)
+                # Pass only the minimal set of parameters to avoid _NotSet issues
+                reddit = praw_module.Reddit(
+                    client_id=client_id,
+                    client_secret=client_secret,
+                    user_agent=user_agent
+                )
                 
                 # Test the connection to ensure it works
                 # This is a simple test that doesn't require authentication
@@ -834,14 +972,9 @@ def update_credentials(request):
                 
             except Exception as e:
                 logger.error(f"Error creating Reddit instance: {e}")
-                # Try one more time with absolute minimal parameters
-                try:
-                    reddit = Reddit(client_id=client_id, client_secret=client_secret, user_agent='Goon/1.0')
-                    logger.info("Reddit API client initialized with minimal parameters")
-                except Exception as retry_e:
-                    logger.error(f"Final attempt to create Reddit instance failed: {retry_e}")
-                    return jsonify({'error': f'Failed to initialize Reddit API: {str(e)}'}), 500
+                return jsonify({'error': f'Failed to initialize Reddit API: {str(e)}'}), 500
                 
+            _reddit_cred_hash = new_hash
             logger.info("Reddit API client reinitialized with new credentials")
             return jsonify({'success': True, 'message': 'Credentials updated successfully'})
         except Exception as e:
@@ -849,3 +982,7 @@ def update_credentials(request):
             return jsonify({'error': f'Credentials saved but failed to initialize Reddit API: {str(e)}'}), 500
     else:
         return jsonify({'error': 'Failed to save credentials'}), 500
+
+# Start the background prefetch thread
+_prefetch_thread = threading.Thread(target=_prefetch_loop, name='reddit-prefetch', daemon=True)
+_prefetch_thread.start()
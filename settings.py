@@ -4,13 +4,18 @@ Handles loading, saving, migrating, and importing user settings.
 """
 import os
 import sys
+import copy
 import json
+import stat
+import shutil
+import types
+import threading
+import time
 import logging
 from datetime import datetime
-from flask import jsonify, request
+from logging.handlers import RotatingFileHandler
 
-from utils import get_application_path
-from credentials import load_credentials
+from utils import get_application_path, atomic_write, json_loads, json_dumps
 
 # Get logger
 logger = logging.getLogger(__name__)
@@ -19,14 +24,76 @@ logger = logging.getLogger(__name__)
 APP_ROOT = get_application_path()
 
 # Settings version for migration system
-SETTINGS_VERSION = "1.1"
+SETTINGS_VERSION = "1.2"
 
 # Settings file paths
 USER_SETTINGS_FILE = os.path.join(APP_ROOT, 'user_settings.json')
 USER_SETTINGS_FALLBACK_FILE = None  # Will be set by launcher if needed
 
-# Default user settings
-default_user_settings = {
+# Paths that are fixed for the life of the process
+_IS_FROZEN = getattr(sys, 'frozen', False)
+_EXE_DIR = os.path.dirname(sys.executable) if _IS_FROZEN else None
+_USER_SETTINGS_DIR = os.path.dirname(USER_SETTINGS_FILE)
+_CONTENT_SOURCE_FILE = os.path.join(_USER_SETTINGS_DIR, 'content_source.txt')
+_BACKUP_FILE = os.path.join(_USER_SETTINGS_DIR, 'user_settings.backup.json')
+
+# Largest settings file accepted for import (bytes); real exports are a few KB
+MAX_IMPORT_SIZE = 10 * 1024 * 1024
+
+# Folders searched, in order, when importing from a directory, and the files looked for
+_IMPORT_SUBDIRS = ('', 'Goon', 'dist')
+_IMPORT_FILE_KINDS = {
+    os.path.normcase('user_settings.json'): 'settings',
+    os.path.normcase('credentials.json'): 'credentials'
+}
+
+# Import diagnostics go to a size-capped import_debug.log through their own logger
+# The file is only created once the first entry is written
+_IMPORT_DEBUG_LOG = os.path.join(_EXE_DIR if _IS_FROZEN else os.path.abspath('.'), 'import_debug.log')
+_import_logger = logging.getLogger('goon.import_debug')
+_import_logger.setLevel(logging.INFO)
+_import_logger.propagate = False
+if not _import_logger.handlers:
+    _import_logger.addHandler(RotatingFileHandler(_IMPORT_DEBUG_LOG, maxBytes=1_000_000, backupCount=2, delay=True))
+
+# Settings keys whose values are shown in the import debug log, and keys it warns about when missing
+_DEBUG_VALUE_KEYS = frozenset(('contentSource', 'timerMin', 'timerMax', 'theme', 'version'))
+_DEBUG_REQUIRED_KEYS = ('contentSource', 'timerMin', 'timerMax', 'theme')
+
+# Dicts bigger than this are summarized rather than serialized by _short()
+_SHORT_MAX_KEYS = 32
+_SHORT_MAX_LIST = 50
+
+# Cache of parsed and migrated settings files
+# Structure: absolute path -> (st_mtime_ns, st_size, settings, matches_disk)
+# matches_disk is False when migration changed the settings, so the file still holds the old version
+_SETTINGS_CACHE = {}
+
+# Credential fields found in settings files: (credentials key, flat settings key, default)
+_CREDENTIAL_FIELDS = (
+    ('client_id', 'redditClientId', ''),
+    ('client_secret', 'redditClientSecret', ''),
+    ('user_agent', 'redditUserAgent', 'Goon/1.0')
+)
+
+# Cache of parsed credentials files seen during import
+# Structure: absolute path -> ((st_mtime_ns, st_size), credentials)
+_CRED_CACHE = {}
+
+# Cached content of content_source.txt, keyed on its mtime and size
+_content_source_cache = {'mtime_ns': -1, 'size': -1, 'value': None}
+
+# Last ISO timestamp handed out by _now_iso(): [epoch second, isoformat string]
+_timestamp_cache = [0, '']
+
+# Temp-file prefix for atomic settings writes
+_SETTINGS_TMP_PREFIX = '.user_settings.'
+
+# Serializes settings writes so concurrent saves can't interleave
+_save_lock = threading.Lock()
+
+# Default user settings (read-only; use _fresh_defaults() for a mutable copy)
+default_user_settings = types.MappingProxyType({
     "favorites": [],
     "punishments": [],
     "favoritesCompletedCount": 0,
@@ -48,17 +115,119 @@ default_user_settings = {
     "penisSize": "",
     "ollamaModel": "mistral:instruct",
     "aiPromptTemplate": "",
-    "version": SETTINGS_VERSION,
-    "lastUpdated": datetime.now().isoformat()
+    "version": SETTINGS_VERSION
+})
+
+def _now_iso():
+    """
+    Return the current local time as an ISO 8601 string.
+    The string is reused for every call within the same wall-clock second.
+    """
+    now = int(time.time())
+    if now != _timestamp_cache[0]:
+        _timestamp_cache[:] = [now, datetime.now().isoformat()]
+    return _timestamp_cache[1]
+
+# Expected types of the default settings fields that have an unambiguous type
+# (timer and metronome values are left out; older files store them as strings or numbers)
+_SETTINGS_FIELD_TYPES = {
+    key: type(value) for key, value in default_user_settings.items()
+    if isinstance(value, (list, bool))
 }
 
-def migrate_settings(settings, current_version=SETTINGS_VERSION):
+def _migrate_0_1_to_0_2(migrated):
+    """Add fields introduced in version 0.2."""
+    logger.info("Migrating settings from version 0.1 to 0.2")
+    
+    if 'contentSource' not in migrated:
+        migrated['contentSource'] = 'reddit'
+    
+    if 'punishmentsEnabled' not in migrated:
+        migrated['punishmentsEnabled'] = False
+    
+    return '0.2'
+
+def _migrate_0_2_to_0_3(migrated):
+    """Add fields introduced in version 0.3."""
+    logger.info("Migrating settings from version 0.2 to 0.3")
+    
+    if 'autoCycleEnabled' not in migrated:
+        migrated['autoCycleEnabled'] = True
+    
+    if 'videoTimerSoftLimitEnabled' not in migrated:
+        migrated['videoTimerSoftLimitEnabled'] = True
+    
+    return '0.3'
+
+def _migrate_0_3_to_1_0(migrated):
+    """Add fields introduced in version 1.0."""
+    logger.info("Migrating settings from version 0.3 to 1.0")
+    
+    if 'enabledContentFolders' not in migrated:
+        migrated['enabledContentFolders'] = []
+    
+    if 'enabledPunishmentFolders' not in migrated:
+        migrated['enabledPunishmentFolders'] = []
+    
+    if 'theme' not in migrated:
+        migrated['theme'] = 'light'
+    
+    # Rename any fields that changed
+    # (None in this version, but this is where you'd handle it)
+    
+    return '1.0'
+
+def _migrate_1_0_to_1_1(migrated):
+    """Add the metronome sound settings introduced in version 1.1."""
+    logger.info("Migrating settings from version 1.0 to 1.1 (adding metronome sound settings)")
+    
+    if 'metronomeSound' not in migrated:
+        migrated['metronomeSound'] = 'default'
+        logger.info("Added default metronomeSound setting")
+    
+    if 'metronomeVolume' not in migrated:
+        migrated['metronomeVolume'] = 0.7
+        logger.info("Added default metronomeVolume setting")
+    
+    return '1.1'
+
+def _migrate_1_1_to_1_2(migrated):
+    """Add the AI teasing settings introduced in version 1.2."""
+    logger.info("Migrating settings from version 1.1 to 1.2 (AI teasing feature)")
+    if 'aiTeasingEnabled' not in migrated:
+        migrated['aiTeasingEnabled'] = False
+    if 'penisSize' not in migrated:
+        migrated['penisSize'] = ""
+    if 'ollamaModel' not in migrated:
+        migrated['ollamaModel'] = "mistral:instruct"
+    if 'aiPromptTemplate' not in migrated:
+        migrated['aiPromptTemplate'] = ""
+    return '1.2'
+
+# Settings migrations in order: (from version, function that upgrades in place and returns the new version)
+_MIGRATIONS = (
+    ('0.1', _migrate_0_1_to_0_2),
+    ('0.2', _migrate_0_2_to_0_3),
+    ('0.3', _migrate_0_3_to_1_0),
+    ('1.0', _migrate_1_0_to_1_1),
+    ('1.1', _migrate_1_1_to_1_2),
+)
+_MIGRATION_INDEX = dict(_MIGRATIONS)
+
+def migrate_settings(settings, current_version=SETTINGS_VERSION, _in_place=False):
     """
     Migrate settings from older versions to current format.
     Returns updated settings dictionary.
+    Pass _in_place=True to update a freshly parsed dict directly instead of a copy.
     """
+    original_version = settings.get('version')
+    
+    # Settings that are already current are returned as-is
+    if original_version == current_version and 'lastUpdated' in settings:
+        return settings
+    
     # Make a copy of the settings to avoid modifying the original
-    migrated = settings.copy()
+    migrated = settings if _in_place else settings.copy()
     
     # Add version if it doesn't exist
     if 'version' not in migrated:
@@ -67,105 +236,179 @@ def migrate_settings(settings, current_version=SETTINGS_VERSION):
     
     # Add lastUpdated if it doesn't exist
     if 'lastUpdated' not in migrated:
-        migrated['lastUpdated'] = datetime.now().isoformat()
+        migrated['lastUpdated'] = _now_iso()
         logger.info("Added lastUpdated field to settings")
     
-    # Migrate from version 0.1 to 0.2
-    if migrated.get('version') == '0.1':
-        logger.info("Migrating settings from version 0.1 to 0.2")
-        
-        # Add new fields introduced in version 0.2
-        if 'contentSource' not in migrated:
-            migrated['contentSource'] = 'reddit'
-        
-        if 'punishmentsEnabled' not in migrated:
-            migrated['punishmentsEnabled'] = False
-        
-        migrated['version'] = '0.2'
-    
-    # Migrate from version 0.2 to 0.3
-    if migrated.get('version') == '0.2':
-        logger.info("Migrating settings from version 0.2 to 0.3")
-        
-        # Add new fields introduced in version 0.3
-        if 'autoCycleEnabled' not in migrated:
-            migrated['autoCycleEnabled'] = True
-        
-        if 'videoTimerSoftLimitEnabled' not in migrated:
-            migrated['videoTimerSoftLimitEnabled'] = True
-        
-        migrated['version'] = '0.3'
-    
-    # Migrate from version 0.3 to 1.0
-    if migrated.get('version') == '0.3':
-        logger.info("Migrating settings from version 0.3 to 1.0")
-        
-        # Add new fields introduced in version 1.0
-        if 'enabledContentFolders' not in migrated:
-            migrated['enabledContentFolders'] = []
-        
-        if 'enabledPunishmentFolders' not in migrated:
-            migrated['enabledPunishmentFolders'] = []
-        
-        if 'theme' not in migrated:
-            migrated['theme'] = 'light'
-        
-        # Rename any fields that changed
-        # (None in this version, but this is where you'd handle it)
-        
-        migrated['version'] = '1.0'
-    
-    # Migrate from version 1.0 to 1.1 (adding metronome sound settings)
-    if migrated.get('version') == '1.0':
-        logger.info("Migrating settings from version 1.0 to 1.1 (adding metronome sound settings)")
-        
-        # Add new metronome sound settings
-        if 'metronomeSound' not in migrated:
-            migrated['metronomeSound'] = 'default'
-            logger.info("Added default metronomeSound setting")
-        
-        if 'metronomeVolume' not in migrated:
-            migrated['metronomeVolume'] = 0.7
-            logger.info("Added default metronomeVolume setting")
-        
-        migrated['version'] = '1.1'
-    
-    # Migrate from version 1.1 to 1.2 (AI teasing feature)
-    if migrated.get('version') == '1.1':
-        logger.info("Migrating settings from version 1.1 to 1.2 (AI teasing feature)")
-        if 'aiTeasingEnabled' not in migrated:
-            migrated['aiTeasingEnabled'] = False
-        if 'penisSize' not in migrated:
-            migrated['penisSize'] = ""
-        if 'ollamaModel' not in migrated:
-            migrated['ollamaModel'] = "mistral:instruct"
-        if 'aiPromptTemplate' not in migrated:
-            migrated['aiPromptTemplate'] = ""
-        migrated['version'] = '1.2'
+    # Apply each migration step in turn
+    while migrated.get('version') in _MIGRATION_INDEX:
+        migrated['version'] = _MIGRATION_INDEX[migrated['version']](migrated)
     
     # Update to current version
     migrated['version'] = current_version
-    migrated['lastUpdated'] = datetime.now().isoformat()
+    if original_version != current_version:
+        migrated['lastUpdated'] = _now_iso()
+        logger.info(f"Settings successfully migrated to version {current_version}")
     
-    logger.info(f"Settings successfully migrated to version {current_version}")
     return migrated
 
+def _validate_settings(settings):
+    """
+    Check that imported data has the shape of a settings file.
+    Returns a description of the first problem found, or None if the settings look valid.
+    """
+    if not isinstance(settings, dict):
+        return "not a dict"
+    if not isinstance(settings.get('contentSource'), str):
+        return "missing contentSource"
+    
+    # Known fields must have the same kind of value as their default
+    for key, expected_type in _SETTINGS_FIELD_TYPES.items():
+        if key in settings and not isinstance(settings[key], expected_type):
+            return f"{key} should be a {expected_type.__name__}"
+    return None
+
+def _fresh_defaults():
+    """Return a mutable copy of the default settings with a current lastUpdated."""
+    defaults = copy.deepcopy(dict(default_user_settings))
+    defaults['lastUpdated'] = _now_iso()
+    return defaults
+
+def _short(obj, limit=200):
+    """
+    Return a short JSON preview of an object for log messages.
+    Large dicts are summarized by their first keys instead of being serialized.
+    """
+    if isinstance(obj, dict) and (len(obj) > _SHORT_MAX_KEYS or any(
+            isinstance(value, list) and len(value) > _SHORT_MAX_LIST for value in obj.values())):
+        return f"{list(obj)[:5]} (+{len(obj)} keys)"
+    
+    try:
+        text = json_dumps(obj, indent=False).decode('utf-8', 'replace')
+    except Exception:
+        text = str(obj)
+    return text[:limit] + ('...' if len(text) > limit else '')
+
+def _stat_file(path):
+    """
+    Stat a path with a single syscall.
+    Returns the stat result for a regular file, or None if it's missing or not a file.
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st if stat.S_ISREG(st.st_mode) else None
+
+def _find_in_dir(base):
+    """
+    Scan a directory and its Goon/ and dist/ subfolders for importable files.
+    Yields ('settings' or 'credentials', path) tuples in search order.
+    """
+    for subdir in _IMPORT_SUBDIRS:
+        directory = os.path.join(base, subdir) if subdir else base
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    kind = _IMPORT_FILE_KINDS.get(os.path.normcase(entry.name))
+                    if kind and entry.is_file():
+                        yield kind, entry.path
+        except OSError:
+            # Missing or unreadable subfolder
+            continue
+
+def _read_credentials_file(path):
+    """
+    Parse a credentials file to import.
+    The parsed dict is cached and only re-read when the file's mtime or size changes.
+    """
+    st = os.stat(path)
+    key = (st.st_mtime_ns, st.st_size)
+    cache_key = os.path.abspath(path)
+    cached = _CRED_CACHE.get(cache_key)
+    if cached and cached[0] == key:
+        return cached[1]
+    
+    with open(path, 'rb') as f:
+        credentials = json_loads(f.read())
+    _CRED_CACHE[cache_key] = (key, credentials)
+    return credentials
+
+def _extract_credentials(settings):
+    """
+    Pull Reddit API credentials out of a settings dict in one pass.
+    Direct properties (older format) win over the nested redditCredentials object (newer format).
+    Returns a credentials dict, or None if there's no client id and secret.
+    """
+    nested = settings.get('redditCredentials')
+    if not isinstance(nested, dict):
+        nested = {}
+    
+    credentials = {
+        key: (settings.get(flat_key) or nested.get(key) or default).strip()
+        for key, flat_key, default in _CREDENTIAL_FIELDS
+    }
+    if credentials['client_id'] and credentials['client_secret']:
+        return credentials
+    return None
+
+def _without_timestamp(settings):
+    """Return a copy of a settings dict without the lastUpdated field, for comparisons."""
+    return {key: value for key, value in settings.items() if key != 'lastUpdated'}
+
+def invalidate_settings_cache(path=None):
+    """
+    Drop the cached settings for a file.
+    Clears the whole cache if no path is given.
+    """
+    if path is None:
+        _SETTINGS_CACHE.clear()
+    else:
+        _SETTINGS_CACHE.pop(os.path.abspath(path), None)
+
+def _read_content_source():
+    """
+    Return the content source override from content_source.txt, or None if there isn't one.
+    The value is cached and only re-read when the file's mtime or size changes.
+    """
+    try:
+        st = os.stat(_CONTENT_SOURCE_FILE)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Error reading content source override: {str(e)}")
+        return None
+    
+    if (st.st_mtime_ns, st.st_size) != (_content_source_cache['mtime_ns'], _content_source_cache['size']):
+        try:
+            with open(_CONTENT_SOURCE_FILE, 'r') as f:
+                value = f.read().strip()
+        except Exception as e:
+            logger.warning(f"Error reading content source override: {str(e)}")
+            return None
+        _content_source_cache.update(mtime_ns=st.st_mtime_ns, size=st.st_size, value=value)
+        logger.info(f"Found content source override: {value}")
+    
+    return _content_source_cache['value']
+
+def invalidate_content_source_cache():
+    """Force the next load to re-read content_source.txt."""
+    _content_source_cache.update(mtime_ns=-1, size=-1, value=None)
+
 def load_settings():
     """
     Load user settings from file.
     Returns a JSON response with settings and status.
     """
+    # Flask is imported lazily so tools that only need the defaults (e.g. build.py) don't pay for it
+    from flask import jsonify
+    
     try:
         logger.info("Loading user settings from file")
         
-        # Determine if we're running as an executable
-        is_frozen = getattr(sys, 'frozen', False)
-        
         # When running as executable, look in the executable directory first
         # Otherwise, look in the application directory (USER_SETTINGS_FILE)
-        if is_frozen:
-            exe_dir = os.path.dirname(sys.executable)
-            primary_settings_file = os.path.join(exe_dir, 'user_settings.json')
+        if _IS_FROZEN:
+            primary_settings_file = os.path.join(_EXE_DIR, 'user_settings.json')
             logger.info(f"Running as executable, will look for settings in: {primary_settings_file}")
         else:
             primary_settings_file = USER_SETTINGS_FILE
@@ -180,20 +423,19 @@ def load_settings():
             
         # For backward compatibility and settings import support, add some additional locations
         # but only if they're not already in the list
-        if is_frozen:
+        if _IS_FROZEN:
             # Add the default location as a fallback if it's different from the primary
             if USER_SETTINGS_FILE != primary_settings_file and USER_SETTINGS_FILE not in settings_locations:
                 settings_locations.append(USER_SETTINGS_FILE)
         else:
             # In development mode, check for a backup file
-            backup_file = os.path.join(os.path.dirname(USER_SETTINGS_FILE), 'user_settings.backup.json')
-            if backup_file not in settings_locations:
-                settings_locations.append(backup_file)
+            if _BACKUP_FILE not in settings_locations:
+                settings_locations.append(_BACKUP_FILE)
             
             # Also check for import marker files
             for location in list(settings_locations):  # Use a copy of the list
                 marker_path = os.path.join(os.path.dirname(location), '.settings_imported')
-                if os.path.exists(marker_path):
+                if _stat_file(marker_path) is not None:
                     # If a marker exists, prioritize this location
                     logger.info(f"Found import marker at {marker_path}, prioritizing {location}")
                     # Move this location to the front of the list
@@ -205,117 +447,83 @@ def load_settings():
         logger.info(f"Checking these locations for settings: {settings_locations}")
         
         # Check if we have a specific content source override file
-        content_source_file = os.path.join(os.path.dirname(USER_SETTINGS_FILE), 'content_source.txt')
-        content_source_override = None
-        if os.path.exists(content_source_file):
-            try:
-                with open(content_source_file, 'r') as f:
-                    content_source_override = f.read().strip()
-                logger.info(f"Found content source override: {content_source_override}")
-            except Exception as e:
-                logger.warning(f"Error reading content source override: {str(e)}")
+        content_source_override = _read_content_source()
         
         # Try each location in order
+        failed_files = set()
         for settings_file in settings_locations:
-            if os.path.exists(settings_file) and os.path.isfile(settings_file):
-                try:
-                    logger.info(f"Attempting to load settings from: {settings_file}")
-                    with open(settings_file, 'r') as f:
-                        settings = json.load(f)
+            st = _stat_file(settings_file)
+            if st is None:
+                continue
+            
+            try:
+                logger.info(f"Attempting to load settings from: {settings_file}")
+                
+                # Reuse the parsed settings if the file hasn't changed since the last load
+                cache_key = os.path.abspath(settings_file)
+                cached = _SETTINGS_CACHE.get(cache_key)
+                if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+                    logger.info(f"Using cached settings for {settings_file}")
+                    settings = copy.deepcopy(cached[2])
+                else:
+                    with open(settings_file, 'rb') as f:
+                        settings = json_loads(f.read())
                     
                     # Migrate settings if needed
-                    settings = migrate_settings(settings)
-                    
-                    # Apply content source override if it exists
-                    if content_source_override:
-                        if settings.get('contentSource') != content_source_override:
-                            logger.info(f"Applying content source override: {content_source_override}")
-                            settings['contentSource'] = content_source_override
-                    
-                    logger.info(f"Successfully loaded settings from {settings_file}")
-                    
-                    # Store the current content source for future reference
+                    matches_disk = settings.get('version') == SETTINGS_VERSION and 'lastUpdated' in settings
+                    settings = migrate_settings(settings, _in_place=True)
+                    _SETTINGS_CACHE[cache_key] = (st.st_mtime_ns, st.st_size, copy.deepcopy(settings), matches_disk)
+                
+                # Apply content source override if it exists
+                if content_source_override:
+                    if settings.get('contentSource') != content_source_override:
+                        logger.info(f"Applying content source override: {content_source_override}")
+                        settings['contentSource'] = content_source_override
+                
+                logger.info(f"Successfully loaded settings from {settings_file}")
+                
+                # Store the current content source for future reference (only if it changed)
+                current_content_source = settings.get('contentSource', 'reddit')
+                if current_content_source != content_source_override:
                     try:
-                        with open(content_source_file, 'w') as f:
-                            f.write(settings.get('contentSource', 'reddit'))
-                        logger.info(f"Saved current content source: {settings.get('contentSource', 'reddit')}")
+                        with open(_CONTENT_SOURCE_FILE, 'w') as f:
+                            f.write(current_content_source)
+                        invalidate_content_source_cache()
+                        logger.info(f"Saved current content source: {current_content_source}")
                     except Exception as e:
                         logger.warning(f"Error saving content source: {str(e)}")
-                    
-                    # Copy these settings to the default location if they're not already there
-                    if settings_file != USER_SETTINGS_FILE:
+                
+                # Copy these settings to the default location if they're not already there
+                if settings_file != USER_SETTINGS_FILE:
+                    default_st = _stat_file(USER_SETTINGS_FILE)
+                    if (default_st is not None and USER_SETTINGS_FILE not in failed_files
+                            and default_st.st_mtime_ns >= st.st_mtime_ns):
+                        logger.info(f"Settings at {USER_SETTINGS_FILE} are up to date, not copying")
+                    else:
                         try:
                             logger.info(f"Copying settings from {settings_file} to {USER_SETTINGS_FILE}")
-                            os.makedirs(os.path.dirname(USER_SETTINGS_FILE), exist_ok=True)
-                            with open(USER_SETTINGS_FILE, 'w') as f:
-                                json.dump(settings, f, indent=2)
+                            os.makedirs(_USER_SETTINGS_DIR, exist_ok=True)
+                            shutil.copyfile(settings_file, USER_SETTINGS_FILE)
                         except Exception as copy_e:
                             logger.warning(f"Could not copy settings to default location: {str(copy_e)}")
-                    
-                    return jsonify({'settings': settings})
-                except Exception as e:
-                    logger.error(f"Error loading settings from {settings_file}: {str(e)}")
-                    # Continue to next location
+                
+                return jsonify({'settings': settings})
+            except Exception as e:
+                logger.error(f"Error loading settings from {settings_file}: {str(e)}")
+                failed_files.add(settings_file)
+                # Continue to next location
         
         # If we get here, no valid settings file was found
         logger.info("Settings file not found at any location, returning defaults")
-        logger.info(f"Default settings: {json.dumps(default_user_settings)[:200]}...")
-        return jsonify({'settings': default_user_settings, 'isDefault': True})
+        defaults = _fresh_defaults()
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Default settings: %s", _short(defaults))
+        return jsonify({'settings': defaults, 'isDefault': True})
     
     except Exception as e:
         logger.error(f"Error loading settings: {str(e)}")
         return jsonify({
-            'settings': default_user_settings, 
-            'isDefault': True, 
-            'error': f'Error loading settings: {str(e)}'
-        })
-        try:
-            logger.info(f"Reading settings from file: {settings_file_to_use}")
-            with open(settings_file_to_use, 'r') as f:
-                settings = json.load(f)
-            
-            logger.info(f"Successfully loaded settings: {json.dumps(settings)[:200]}...")
-            
-            # Check if settings need migration
-            if 'version' not in settings or settings.get('version') != SETTINGS_VERSION:
-                logger.info(f"Migrating settings from version {settings.get('version', 'unknown')} to {SETTINGS_VERSION}")
-                # Migrate settings to current version
-                settings = migrate_settings(settings)
-                
-                # Try to save the migrated settings
-                try:
-                    with open(settings_file_to_use, 'w') as f:
-                        json.dump(settings, f, indent=2)
-                    logger.info(f"Saved migrated settings to {settings_file_to_use}")
-                except Exception as save_e:
-                    logger.warning(f"Could not save migrated settings: {str(save_e)}")
-                    # Continue with the migrated settings in memory
-            
-            # Load API credentials if available
-            credentials = load_credentials()
-            if credentials and credentials.get('client_id') and credentials.get('client_secret'):
-                # Add credentials to the settings object
-                settings['goonCredentials'] = {
-                    'client_id': credentials.get('client_id', ''),
-                    'client_secret': credentials.get('client_secret', ''),
-                    'user_agent': credentials.get('user_agent', 'Goon/1.0')
-                }
-                logger.info("Added Goon API credentials to settings response")
-                
-            logger.info(f"User settings loaded from {settings_file_to_use}")
-            return jsonify({'settings': settings, 'isDefault': False})
-        except json.JSONDecodeError as je:
-            logger.error(f"Invalid JSON in settings file: {str(je)}")
-            return jsonify({
-                'settings': default_user_settings, 
-                'isDefault': True, 
-                'error': f'Invalid JSON in settings file: {str(je)}'
-            })
-    except Exception as e:
-        logger.error(f"Error loading user settings: {str(e)}")
-        # Return default settings on error
-        return jsonify({
-            'settings': default_user_settings, 
+            'settings': _fresh_defaults(), 
             'isDefault': True, 
             'error': f'Error loading settings: {str(e)}'
         })
@@ -325,6 +533,8 @@ def save_settings():
     Save user settings to file.
     Returns a JSON response indicating success or failure.
     """
+    from flask import jsonify, request
+    
     try:
         data = request.json
         if not data:
@@ -332,7 +542,8 @@ def save_settings():
             return jsonify({'error': 'Invalid request data'}), 400
             
         # Log received settings data
-        logger.info(f"Received settings data: {json.dumps(data)[:200]}...")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Received settings data: %s", _short(data))
         
         # Remove any sensitive data that shouldn't be stored
         # (Currently there's no sensitive data in user settings, but this is a good practice)
@@ -340,33 +551,40 @@ def save_settings():
         
         # Ensure version and lastUpdated are set
         settings_to_save['version'] = SETTINGS_VERSION
-        settings_to_save['lastUpdated'] = datetime.now().isoformat()
+        settings_to_save['lastUpdated'] = _now_iso()
         
         # Save the content source to a separate file for persistence
         content_source = settings_to_save.get('contentSource')
-        if content_source:
-            content_source_file = os.path.join(os.path.dirname(USER_SETTINGS_FILE), 'content_source.txt')
+        if content_source and content_source != _read_content_source():
             try:
-                os.makedirs(os.path.dirname(content_source_file), exist_ok=True)
-                with open(content_source_file, 'w') as f:
+                os.makedirs(_USER_SETTINGS_DIR, exist_ok=True)
+                with open(_CONTENT_SOURCE_FILE, 'w') as f:
                     f.write(content_source)
+                invalidate_content_source_cache()
                 logger.info(f"Saved content source to separate file: {content_source}")
             except Exception as e:
                 logger.warning(f"Error saving content source to separate file: {str(e)}")
         
-        # Determine if we're running as an executable
-        is_frozen = getattr(sys, 'frozen', False)
-        
         # When running as executable, save to the executable directory
         # Otherwise, save to the application directory (USER_SETTINGS_FILE)
-        if is_frozen:
-            exe_dir = os.path.dirname(sys.executable)
-            settings_file_to_use = os.path.join(exe_dir, 'user_settings.json')
+        if _IS_FROZEN:
+            settings_file_to_use = os.path.join(_EXE_DIR, 'user_settings.json')
             logger.info(f"Running as executable, will save settings to: {settings_file_to_use}")
         else:
             settings_file_to_use = USER_SETTINGS_FILE
             logger.info(f"Running in development mode, will save settings to: {settings_file_to_use}")
         
+        # Nothing to write if only lastUpdated differs from the cached on-disk settings
+        # (entries whose migration changed anything never match, so migrated files still get written)
+        cache_key = os.path.abspath(settings_file_to_use)
+        cached = _SETTINGS_CACHE.get(cache_key)
+        if cached:
+            st = _stat_file(settings_file_to_use)
+            if st is not None and cached[3] and cached[0] == st.st_mtime_ns and cached[1] == st.st_size and \
+                    _without_timestamp(cached[2]) == _without_timestamp(settings_to_save):
+                logger.info(f"Settings unchanged, skipping write to {settings_file_to_use}")
+                return jsonify({'success': True, 'message': 'Settings unchanged', 'unchanged': True})
+        
         # Create directory if it doesn't exist
         try:
             os.makedirs(os.path.dirname(settings_file_to_use), exist_ok=True)
@@ -377,20 +595,26 @@ def save_settings():
         # Try to save settings to the selected location
         try:
             logger.info(f"Saving settings to: {settings_file_to_use}")
-            with open(settings_file_to_use, 'w') as f:
-                json.dump(settings_to_save, f, indent=2)
-            
-            logger.info(f"User settings successfully saved to {settings_file_to_use}")
-            
-            # Create a backup in the same directory
-            try:
-                backup_file = os.path.join(os.path.dirname(settings_file_to_use), 'user_settings.backup.json')
-                with open(backup_file, 'w') as f:
-                    json.dump(settings_to_save, f, indent=2)
-                logger.info(f"Created settings backup at {backup_file}")
-            except Exception as backup_e:
-                logger.warning(f"Could not create settings backup: {str(backup_e)}")
-                # This is non-critical, so we continue
+            with _save_lock:
+                atomic_write(settings_file_to_use, json_dumps(settings_to_save), _SETTINGS_TMP_PREFIX)
+                
+                # Keep the cache in step with what was just written so the next load skips parsing
+                st = _stat_file(settings_file_to_use)
+                if st is not None:
+                    _SETTINGS_CACHE[cache_key] = (st.st_mtime_ns, st.st_size, copy.deepcopy(settings_to_save), True)
+                else:
+                    invalidate_settings_cache(settings_file_to_use)
+                
+                logger.info(f"User settings successfully saved to {settings_file_to_use}")
+                
+                # Create a backup in the same directory by copying the file just written
+                try:
+                    backup_file = os.path.join(os.path.dirname(settings_file_to_use), 'user_settings.backup.json')
+                    shutil.copyfile(settings_file_to_use, backup_file)
+                    logger.info(f"Created settings backup at {backup_file}")
+                except Exception as backup_e:
+                    logger.warning(f"Could not create settings backup: {str(backup_e)}")
+                    # This is non-critical, so we continue
             
             return jsonify({'success': True, 'message': f'Settings saved successfully to {settings_file_to_use}'})
             
@@ -398,11 +622,11 @@ def save_settings():
             logger.error(f"Failed to save settings to {settings_file_to_use}: {str(e)}")
             
             # If we're in development mode and the primary location fails, try a backup location
-            if not is_frozen:
+            if not _IS_FROZEN:
                 try:
                     temp_file = os.path.join(APP_ROOT, 'user_settings.temp.json')
-                    with open(temp_file, 'w') as f:
-                        json.dump(settings_to_save, f, indent=2)
+                    with open(temp_file, 'wb') as f:
+                        f.write(json_dumps(settings_to_save))
                     logger.info(f"Saved settings to temporary file: {temp_file}")
                     return jsonify({'success': True, 'message': f'Settings saved to temporary file: {temp_file}'})
                 except Exception as temp_e:
@@ -415,38 +639,39 @@ def save_settings():
         return jsonify({'error': f'Failed to save settings: {str(e)}'}), 500
 
 def debug_import_process(settings_data, file_path, stage="unknown"):
-    """Create a debug log file with detailed information about the import process"""
+    """Write detailed information about the import process to the import debug log"""
+    # Only build the entry when debug logging is enabled
+    if not logger.isEnabledFor(logging.DEBUG):
+        return False
+    
     try:
-        # Create a debug log in a location that will definitely be accessible
-        is_frozen = getattr(sys, 'frozen', False)
-        log_dir = os.path.dirname(sys.executable) if is_frozen else os.path.abspath('.')
-        log_file = os.path.join(log_dir, 'import_debug.log')
-        
-        with open(log_file, 'a') as f:
-            f.write(f"\n\n===== IMPORT DEBUG LOG - {datetime.now().isoformat()} - STAGE: {stage} =====\n")
-            f.write(f"File path: {file_path}\n")
-            f.write(f"Is executable: {is_frozen}\n")
-            f.write(f"USER_SETTINGS_FILE: {USER_SETTINGS_FILE}\n")
-            f.write(f"APP_ROOT: {APP_ROOT}\n")
-            f.write(f"Settings data type: {type(settings_data)}\n")
+        lines = [
+            f"\n===== IMPORT DEBUG LOG - {_now_iso()} - STAGE: {stage} =====",
+            f"File path: {file_path}",
+            f"Is executable: {_IS_FROZEN}",
+            f"USER_SETTINGS_FILE: {USER_SETTINGS_FILE}",
+            f"APP_ROOT: {APP_ROOT}",
+            f"Settings data type: {type(settings_data)}"
+        ]
+        
+        if isinstance(settings_data, dict):
+            lines.append("\nSettings keys:")
+            for key, value in settings_data.items():
+                # For certain keys, show their values
+                if key in _DEBUG_VALUE_KEYS:
+                    lines.append(f"  - {key}: {type(value)} = {value}")
+                else:
+                    lines.append(f"  - {key}: {type(value)}")
             
-            if isinstance(settings_data, dict):
-                f.write("\nSettings keys:\n")
-                for key in settings_data.keys():
-                    f.write(f"  - {key}: {type(settings_data[key])}")
-                    # For certain keys, show their values
-                    if key in ['contentSource', 'timerMin', 'timerMax', 'theme', 'version']:
-                        f.write(f" = {settings_data[key]}")
-                    f.write("\n")
-                
-                # Check for specific important keys
-                for key in ['contentSource', 'timerMin', 'timerMax', 'theme']:
-                    if key not in settings_data:
-                        f.write(f"WARNING: Key '{key}' is missing!\n")
-            else:
-                f.write(f"Settings data: {settings_data}\n")
-                
-        logger.info(f"Created debug log at {log_file}")
+            # Check for specific important keys
+            for key in _DEBUG_REQUIRED_KEYS:
+                if key not in settings_data:
+                    lines.append(f"WARNING: Key '{key}' is missing!")
+        else:
+            lines.append(f"Settings data: {settings_data}")
+        
+        _import_logger.info("\n".join(lines))
+        logger.info(f"Wrote import debug log entry to {_IMPORT_DEBUG_LOG}")
         return True
     except Exception as e:
         logger.error(f"Error creating debug log: {str(e)}")
@@ -464,46 +689,38 @@ def import_settings_from_path(import_path, credentials_file=None):
     Returns:
         flask.Response: JSON response with import results
     """
+    from flask import jsonify
+    
     try:
         # Check if the path exists and is readable
-        if not os.path.exists(import_path):
+        try:
+            import_st = os.stat(import_path)
+        except OSError:
             return jsonify({'error': 'The specified path does not exist'}), 404
             
         if not os.access(import_path, os.R_OK):
             return jsonify({'error': 'Cannot read from the specified path'}), 403
             
         # If the path is a directory, look for user_settings.json and credentials.json in it
-        if os.path.isdir(import_path):
-            # Look for settings file
-            potential_settings_files = [
-                os.path.join(import_path, 'user_settings.json'),
-                os.path.join(import_path, 'Goon', 'user_settings.json'),
-                os.path.join(import_path, 'dist', 'user_settings.json')
-            ]
+        if stat.S_ISDIR(import_st.st_mode):
+            # Scan the directory and its usual subfolders once for both files
+            found_files = {'settings': [], 'credentials': []}
+            for kind, file_path in _find_in_dir(import_path):
+                found_files[kind].append(file_path)
             
-            found_settings_file = None
-            for file_path in potential_settings_files:
-                if os.path.exists(file_path) and os.path.isfile(file_path):
-                    found_settings_file = file_path
-                    break
-                    
-            if found_settings_file:
+            if found_files['settings']:
+                found_settings_file = found_files['settings'][0]
                 import_path = found_settings_file
                 logger.info(f"Found settings file in directory: {import_path}")
                 
-                # Also look for credentials file in the same directory if not already provided
-                if not credentials_file:
-                    potential_credentials_files = [
-                        os.path.join(os.path.dirname(found_settings_file), 'credentials.json'),
-                        os.path.join(import_path, 'Goon', 'credentials.json'),
-                        os.path.join(import_path, 'dist', 'credentials.json')
-                    ]
-                    
-                    for cred_file in potential_credentials_files:
-                        if os.path.exists(cred_file) and os.path.isfile(cred_file):
-                            credentials_file = cred_file
-                            logger.info(f"Found credentials file: {credentials_file}")
-                            break
+                # Also look for credentials file, preferring the settings file's directory, if not already provided
+                if not credentials_file and found_files['credentials']:
+                    settings_dir = os.path.dirname(found_settings_file)
+                    credentials_file = next(
+                        (f for f in found_files['credentials'] if os.path.dirname(f) == settings_dir),
+                        found_files['credentials'][0]
+                    )
+                    logger.info(f"Found credentials file: {credentials_file}")
             else:
                 return jsonify({'error': 'Could not find settings file in the specified directory'}), 404
         
@@ -512,43 +729,47 @@ def import_settings_from_path(import_path, credentials_file=None):
             # Create debug log for the start of import process
             debug_import_process("Starting import process", import_path, "start")
             
-            with open(import_path, 'r') as f:
-                file_content = f.read()
-                # Create debug log with raw file content
-                debug_import_process(file_content, import_path, "raw_content")
-                # Reset file pointer to beginning
-                f.seek(0)
-                imported_settings = json.load(f)
+            # Read at most one byte past the limit so oversized files are rejected before parsing
+            with open(import_path, 'rb') as f:
+                file_content = f.read(MAX_IMPORT_SIZE + 1)
+            if len(file_content) > MAX_IMPORT_SIZE:
+                logger.error(f"Settings file {import_path} is larger than {MAX_IMPORT_SIZE} bytes")
+                return jsonify({'error': 'The settings file is too large to import'}), 413
+            imported_settings = json_loads(file_content)
+            
+            # Create debug log with the start of the raw file content
+            if logger.isEnabledFor(logging.DEBUG):
+                debug_import_process(file_content[:4096].decode('utf-8', 'replace'), import_path, "raw_content")
             
             # Create debug log with parsed settings
             debug_import_process(imported_settings, import_path, "parsed_settings")
                 
             # Validate that it's a proper settings file
-            if not isinstance(imported_settings, dict) or 'contentSource' not in imported_settings:
-                logger.error(f"Invalid settings file: not a dict or missing contentSource")
+            validation_error = _validate_settings(imported_settings)
+            if validation_error:
+                logger.error(f"Invalid settings file: {validation_error}")
                 debug_import_process("Invalid settings file", import_path, "validation_failed")
                 return jsonify({'error': 'The file does not contain valid Goon settings'}), 400
                 
-            # Migrate the settings to the current version
-            migrated_settings = migrate_settings(imported_settings)
+            # Migrate the settings to the current version, then fill anything still missing from the defaults
+            migrated_settings = migrate_settings(imported_settings, _in_place=True)
+            for key, default in default_user_settings.items():
+                if key not in migrated_settings:
+                    migrated_settings[key] = copy.deepcopy(default)
             
             # Create debug log with migrated settings
             debug_import_process(migrated_settings, import_path, "migrated_settings")
             
             # Save the imported settings
             try:
-                # Determine if we're running as an executable
-                is_frozen = getattr(sys, 'frozen', False)
+                payload = json_dumps(migrated_settings)
                 
                 # For executable version, ensure we're saving to a persistent location
-                if is_frozen:
-                    # Get the executable directory
-                    exe_dir = os.path.dirname(sys.executable)
-                    
+                if _IS_FROZEN:
                     # Save to multiple possible locations to ensure at least one works
                     locations_to_save = [
                         # Primary location - executable directory
-                        os.path.join(exe_dir, 'user_settings.json'),
+                        os.path.join(_EXE_DIR, 'user_settings.json'),
                         # Default location
                         USER_SETTINGS_FILE,
                         # Backup in user's documents folder
@@ -560,6 +781,10 @@ def import_settings_from_path(import_path, credentials_file=None):
                     # Create debug log with save locations
                     debug_import_process(locations_to_save, import_path, "save_locations")
                     
+                    # Serialize once and write the same bytes to every location
+                    primary_file = None
+                    marker_data = _now_iso().encode('utf-8')
+                    
                     # Try to save to all locations
                     for save_path in locations_to_save:
                         try:
@@ -567,43 +792,50 @@ def import_settings_from_path(import_path, credentials_file=None):
                             os.makedirs(os.path.dirname(save_path), exist_ok=True)
                             
                             # Save the settings
-                            with open(save_path, 'w') as f:
-                                json.dump(migrated_settings, f, indent=2)
+                            atomic_write(save_path, payload, _SETTINGS_TMP_PREFIX)
+                            invalidate_settings_cache(save_path)
+                            if primary_file is None:
+                                primary_file = save_path
                             logger.info(f"Saved settings to: {save_path}")
                             
                             # Create a marker file to indicate successful import
                             marker_path = os.path.join(os.path.dirname(save_path), '.settings_imported')
-                            with open(marker_path, 'w') as f:
-                                f.write(datetime.now().isoformat())
+                            atomic_write(marker_path, marker_data, _SETTINGS_TMP_PREFIX)
                             logger.info(f"Created import marker at: {marker_path}")
                         except Exception as e:
                             logger.warning(f"Failed to save settings to {save_path}: {str(e)}")
                     
                     # Create a special debug file with the complete settings
-                    debug_file = os.path.join(exe_dir, 'imported_settings_debug.json')
+                    debug_file = os.path.join(_EXE_DIR, 'imported_settings_debug.json')
                     try:
-                        with open(debug_file, 'w') as f:
-                            json.dump(migrated_settings, f, indent=2)
+                        if primary_file is not None:
+                            shutil.copyfile(primary_file, debug_file)
+                        else:
+                            atomic_write(debug_file, payload, _SETTINGS_TMP_PREFIX)
+                            primary_file = debug_file
                         logger.info(f"Created debug settings file at: {debug_file}")
                     except Exception as e:
                         logger.warning(f"Failed to create debug file: {str(e)}")
                 else:
                     # Standard save for development version
-                    with open(USER_SETTINGS_FILE, 'w') as f:
-                        json.dump(migrated_settings, f, indent=2)
+                    atomic_write(USER_SETTINGS_FILE, payload, _SETTINGS_TMP_PREFIX)
+                    invalidate_settings_cache(USER_SETTINGS_FILE)
+                    primary_file = USER_SETTINGS_FILE
                     logger.info(f"Successfully imported and saved settings from {import_path}")
                 
                 # Create a backup in a location that will definitely be accessible
                 try:
                     # For executable, use the executable directory
-                    if is_frozen:
-                        backup_dir = exe_dir
+                    if _IS_FROZEN:
+                        backup_dir = _EXE_DIR
                     else:
                         backup_dir = APP_ROOT
                         
                     backup_file = os.path.join(backup_dir, 'user_settings.imported.backup.json')
-                    with open(backup_file, 'w') as f:
-                        json.dump(migrated_settings, f, indent=2)
+                    if primary_file is not None:
+                        shutil.copyfile(primary_file, backup_file)
+                    else:
+                        atomic_write(backup_file, payload, _SETTINGS_TMP_PREFIX)
                     logger.info(f"Created backup of imported settings at {backup_file}")
                 except Exception as backup_e:
                     logger.warning(f"Could not create backup of imported settings: {str(backup_e)}")
@@ -617,30 +849,10 @@ def import_settings_from_path(import_path, credentials_file=None):
                 from credentials import save_credentials, CREDENTIALS_FILE
                 
                 # Check for credentials in different formats
-                credentials_found = False
-                extracted_credentials = None
-                
-                # Check for direct properties (older format)
-                if migrated_settings.get('redditClientId') and migrated_settings.get('redditClientSecret'):
-                    extracted_credentials = {
-                        'client_id': migrated_settings.get('redditClientId', '').strip(),
-                        'client_secret': migrated_settings.get('redditClientSecret', '').strip(),
-                        'user_agent': migrated_settings.get('redditUserAgent', 'Goon/1.0').strip()
-                    }
-                    credentials_found = True
-                    logger.info("Found Reddit credentials in settings (direct properties)")
-                
-                # Check for nested redditCredentials object (newer format)
-                elif migrated_settings.get('redditCredentials') and \
-                     migrated_settings['redditCredentials'].get('client_id') and \
-                     migrated_settings['redditCredentials'].get('client_secret'):
-                    extracted_credentials = {
-                        'client_id': migrated_settings['redditCredentials'].get('client_id', '').strip(),
-                        'client_secret': migrated_settings['redditCredentials'].get('client_secret', '').strip(),
-                        'user_agent': migrated_settings['redditCredentials'].get('user_agent', 'Goon/1.0').strip()
-                    }
-                    credentials_found = True
-                    logger.info("Found Reddit credentials in settings (redditCredentials object)")
+                extracted_credentials = _extract_credentials(migrated_settings)
+                credentials_found = extracted_credentials is not None
+                if credentials_found:
+                    logger.info("Found Reddit credentials in settings")
                 
                 # If credentials were found in the settings file
                 if credentials_found and extracted_credentials:
@@ -653,17 +865,9 @@ def import_settings_from_path(import_path, credentials_file=None):
                             "extracted_credentials"
                         )
                         
-                        # Add credentials to settings in both formats for compatibility
-                        # This ensures they're saved when the settings are saved
-                        migrated_settings['redditClientId'] = extracted_credentials['client_id']
-                        migrated_settings['redditClientSecret'] = extracted_credentials['client_secret']
-                        migrated_settings['redditUserAgent'] = extracted_credentials['user_agent']
-                        
-                        migrated_settings['redditCredentials'] = {
-                            'client_id': extracted_credentials['client_id'],
-                            'client_secret': extracted_credentials['client_secret'],
-                            'user_agent': extracted_credentials['user_agent']
-                        }
+                        # Return the credentials in the nested redditCredentials format only;
+                        # every reader falls back to it when the flat redditClientId keys are absent
+                        migrated_settings['redditCredentials'] = extracted_credentials
                         
                         # Save the credentials separately to ensure they're available to the Reddit API
                         if save_credentials(extracted_credentials):
@@ -680,11 +884,10 @@ def import_settings_from_path(import_path, credentials_file=None):
                 elif credentials_file:
                     try:
                         # Read the credentials file
-                        with open(credentials_file, 'r') as f:
-                            imported_credentials = json.load(f)
+                        imported_credentials = _read_credentials_file(credentials_file)
                         
-                        # Save the credentials
-                        if save_credentials(imported_credentials):
+                        # Save the credentials (a copy, since saving normalizes the dict in place)
+                        if save_credentials(dict(imported_credentials)):
                             logger.info(f"Successfully imported and saved credentials from {credentials_file}")
                             credentials_imported = True
                             credentials_message = "API credentials successfully imported"
@@ -722,6 +925,8 @@ def import_settings():
     Import settings from a user-specified path.
     Returns a JSON response indicating success or failure.
     """
+    from flask import jsonify, request
+    
     try:
         data = request.json
         if not data or 'path' not in data:
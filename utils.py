@@ -2,25 +2,41 @@
 Utility functions for the Goon application.
 """
 import os
+import re
 import sys
+import stat
 import logging
+import tempfile
 import json
 from datetime import datetime
+from functools import lru_cache
 
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler()
-    ]
-)
+# orjson is optional; fall back to the standard library when it isn't installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Process umask, read once at import (os.umask can only be read by setting it)
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+# Logging is configured by the entry point (app.py / launcher.py)
 logger = logging.getLogger(__name__)
 
+# Bytes deleted from a lowercased subreddit name: everything except a-z, 0-9, underscore and hyphen
+_SUB_VALID_BYTES = frozenset(b'abcdefghijklmnopqrstuvwxyz0123456789_-')
+_SUB_DROP_BYTES = bytes(b for b in range(256) if b not in _SUB_VALID_BYTES)
+
+# An already-clean subreddit name (no r/ prefix, whitespace, capitals or invalid characters)
+_CLEAN_SUB_RE = re.compile(r'[a-z0-9_-]+')
+
+@lru_cache(maxsize=None)
 def get_application_path():
     """
     Get the absolute path to the application directory.
     Works in both development and PyInstaller environments.
+    The path can't change while the process runs, so it's computed once.
     """
     try:
         # PyInstaller creates a temp folder and stores path in _MEIPASS
@@ -30,30 +46,71 @@ def get_application_path():
     except Exception:
         # We are running in a normal Python environment
         # Get the directory containing the script
-        base_path = os.path.dirname(os.path.abspath(__file__))
+        base_path = os.path.dirname(__file__)
+        if not os.path.isabs(base_path):
+            # Only relative imports (e.g. running from the script's own directory) need resolving
+            base_path = os.path.abspath(base_path)
         logger.info(f"Running in development environment, base path: {base_path}")
         return base_path
 
+def json_loads(data):
+    """Parse JSON from bytes or str, using orjson when available."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def json_dumps(obj, indent=True):
+    """Serialize an object to UTF-8 JSON bytes (2-space indent by default), using orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, indent=2 if indent else None).encode('utf-8')
+
+def atomic_write(path, data, prefix='.tmp.'):
+    """
+    Write bytes to a file atomically.
+    Data goes to a temp file (named with prefix) in the same directory, is fsynced, then renamed over the target.
+    The target keeps its permissions; new files get the usual umask-based mode rather than mkstemp's 0600.
+    """
+    try:
+        mode = stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        mode = 0o666 & ~_UMASK
+    
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=prefix, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    except Exception:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+@lru_cache(maxsize=4096)
 def clean_subreddit_name(name):
     """
     Clean and normalize a subreddit name.
     Removes 'r/', whitespace, and converts to lowercase.
+    Results are cached since the same few names are cleaned over and over.
     """
     if not name:
         return ""
-        
-    # Remove r/ prefix if present
-    if name.lower().startswith('r/'):
-        name = name[2:]
-        
-    # Remove leading/trailing whitespace
-    name = name.strip()
     
-    # Convert to lowercase
-    name = name.lower()
+    # Fast path: names that are already clean are returned unchanged
+    if _CLEAN_SUB_RE.fullmatch(name):
+        return name
     
-    # Remove any remaining invalid characters
-    # Only allow alphanumeric, underscore, and hyphen
-    name = ''.join(c for c in name if c.isalnum() or c == '_' or c == '-')
+    # Lowercase and trim, then remove the r/ prefix if present
+    name = name.strip().lower()
+    if name.startswith('r/'):
+        name = name[2:]
     
-    return name
+    # Remove any remaining invalid characters
+    # Only allow alphanumeric, underscore, and hyphen; valid names are pure ASCII,
+    # so anything else is dropped by the encode and the rest by one table lookup per byte
+    return name.encode('ascii', 'ignore').translate(None, _SUB_DROP_BYTES).decode('ascii')